@@ -0,0 +1,296 @@
+# Benchmark suite for the task scripts
+# Generates deterministic synthetic data (decades of daily gas prices, books of storage contracts and
+# loan files of up to 10M rows), times the public functions of the task scripts on it and reports
+# throughput, latency percentiles and peak memory. Results can be saved and compared with a baseline:
+#
+#     python benchmarks.py --scale small --save baseline.json
+#     python benchmarks.py --scale small --compare baseline.json
+
+# Some imports to be used throughout the benchmarks
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from compiled_scorer import LOAN_FEATURES
+
+# Directory of the task scripts, and of the generated data below it
+REPO_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+DATA_DIRECTORY = os.path.join(REPO_DIRECTORY, '.benchmark_data')
+
+# Data sizes and number of timed calls of every scale
+SCALES = {
+    'small': {'price_years': 30, 'contracts': 1000, 'contract_dates': 12, 'loans': 100000,
+              'prediction_calls': 2000, 'expected_loss_calls': 500, 'read_calls': 20, 'train_calls': 3, 'quantize_calls': 20},
+    'large': {'price_years': 50, 'contracts': 100000, 'contract_dates': 12, 'loans': 10000000,
+              'prediction_calls': 20000, 'expected_loss_calls': 2000, 'read_calls': 20, 'train_calls': 1, 'quantize_calls': 5},
+}
+
+# Benchmarked functions, in the order they run
+BENCHMARKS = ['price_prediction_from_date', 'price_gas_contract_model', 'price_gas_contract_csv', 'read_gas_data',
+              'calculate_expected_loss', 'train_model', 'quantize_fico_scores']
+
+
+# Load a task script by path, since names such as task-2.py cannot be imported with an import statement
+def load_task_module(file_name):
+    module_name = os.path.splitext(file_name)[0].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(REPO_DIRECTORY, file_name))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# Synthetic daily gas prices: upward trend, yearly seasonality and mean-reverting noise
+def generate_gas_prices(file_path, years=30, seed=0):
+    """
+    Write years of daily prices ending on 2024-09-30 in the Nat_Gas.csv format.
+    The first year is 1975 at the latest, so the two-digit years of the file stay unambiguous.
+    """
+    generator = np.random.default_rng(seed)
+    dates = pd.date_range(end='2024-09-30', periods=int(round(years * 365.25)), freq='D')
+    t = np.arange(len(dates)) / 365.25
+    noise = np.zeros(len(dates))
+    shocks = generator.normal(0.0, 0.08, len(dates))
+    for i in range(1, len(dates)):
+        noise[i] = 0.98 * noise[i - 1] + shocks[i]
+    prices = 8.0 + 0.15 * t + 0.8 * np.cos(2 * np.pi * (t - 0.05)) + noise
+    pd.DataFrame({'Dates': dates.strftime('%m/%d/%y'), 'Prices': np.round(prices, 4)}).to_csv(file_path, index=False)
+
+
+# Synthetic book of storage contracts within the priced period
+def generate_contract_book(num_contracts, num_dates=12, seed=0, start='2021-01-01', end='2024-09-30'):
+    """
+    Return a list of contract dicts with the arguments of price_gas_contract: num_dates sorted
+    injection dates followed by num_dates sorted withdrawal dates, and random rates and capacities.
+    """
+    generator = np.random.default_rng(seed)
+    first = np.datetime64(start, 'D')
+    span = int((np.datetime64(end, 'D') - first).astype(np.int64))
+    contracts = []
+    for _ in range(num_contracts):
+        offsets = np.sort(generator.choice(span, 2 * num_dates, replace=False))
+        dates = np.datetime_as_string(first + offsets, unit='D').tolist()
+        contracts.append({
+            'injection_dates': dates[:num_dates],
+            'withdrawal_dates': dates[num_dates:],
+            'injection_rate': float(generator.integers(50, 200)),
+            'withdrawal_rate': float(generator.integers(50, 200)),
+            'max_volume': float(generator.integers(500, 3000)),
+            'storage_costs': float(generator.uniform(0.01, 0.1)),
+        })
+    return contracts
+
+
+# Synthetic loan file in the Task 3 and 4 format, written chunk by chunk
+def generate_loan_file(file_path, num_rows, seed=0, chunk_size=1000000):
+    """
+    Write num_rows loans with the columns of Task 3 and 4_Loan_Data.csv. Defaults are drawn from
+    a logistic model of the features, so the PD model has something to learn.
+    """
+    generator = np.random.default_rng(seed)
+    for start in range(0, num_rows, chunk_size):
+        n = min(chunk_size, num_rows - start)
+        credit_lines = generator.poisson(1.5, n)
+        income = np.round(generator.lognormal(11.1, 0.35, n), 2)
+        loan_amt = np.round(income * generator.uniform(0.02, 0.12, n), 2)
+        total_debt = np.round(loan_amt + credit_lines * generator.uniform(1000, 5000, n), 2)
+        years_employed = generator.integers(0, 11, n)
+        fico_score = np.clip(np.round(generator.normal(640, 60, n)), 300, 850).astype(np.int64)
+        logit = -1.0 + 0.9 * credit_lines + 4e-5 * (total_debt - income * 0.1) - 0.25 * years_employed - 0.008 * (fico_score - 640)
+        default = (generator.random(n) < 1.0 / (1.0 + np.exp(-logit))).astype(np.int64)
+        chunk = pd.DataFrame({
+            'customer_id': np.arange(start, start + n) + 1000000,
+            'credit_lines_outstanding': credit_lines,
+            'loan_amt_outstanding': loan_amt,
+            'total_debt_outstanding': total_debt,
+            'income': income,
+            'years_employed': years_employed,
+            'fico_score': fico_score,
+            'default': default,
+        })
+        chunk.to_csv(file_path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+
+# Generate the data of a scale once; files are reused while they exist, since the generators are deterministic
+def prepare_benchmark_data(scale='small', seed=0):
+    settings = SCALES[scale]
+    directory = os.path.join(DATA_DIRECTORY, f'{scale}-seed{seed}')
+    os.makedirs(directory, exist_ok=True)
+
+    # task-two.py always prices from Nat_Gas.csv in the working directory
+    price_path = os.path.join(directory, 'Nat_Gas.csv')
+    if not os.path.exists(price_path):
+        generate_gas_prices(price_path, settings['price_years'], seed)
+    loan_path = os.path.join(directory, 'Task 3 and 4_Loan_Data.csv')
+    if not os.path.exists(loan_path):
+        generate_loan_file(loan_path + '.tmp', settings['loans'], seed)
+        os.replace(loan_path + '.tmp', loan_path)
+    return directory, price_path, loan_path
+
+
+# Time a function over a list of argument tuples
+def run_benchmark(function, cases, items_per_call=1):
+    """
+    Call function(*case) for every case, after one untimed warm-up call, then once more under
+    tracemalloc for the peak memory. Returns calls, items, seconds, throughput (items per
+    second), the cold (first call) and p50/p90/p99 latency in milliseconds and peak_memory_mb.
+    """
+    started = time.perf_counter()
+    function(*cases[0])
+    cold = time.perf_counter() - started
+
+    latencies = np.empty(len(cases))
+    for i, case in enumerate(cases):
+        started = time.perf_counter()
+        function(*case)
+        latencies[i] = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        function(*cases[0])
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    total = float(latencies.sum())
+    items = len(cases) * items_per_call
+    return {
+        'calls': len(cases),
+        'items': items,
+        'seconds': total,
+        'throughput': items / total if total > 0 else float('inf'),
+        'cold_ms': cold * 1000.0,
+        'p50_ms': float(np.percentile(latencies, 50)) * 1000.0,
+        'p90_ms': float(np.percentile(latencies, 90)) * 1000.0,
+        'p99_ms': float(np.percentile(latencies, 99)) * 1000.0,
+        'peak_memory_mb': peak_memory / 2 ** 20,
+    }
+
+
+# Function to run the benchmark suite
+def run_benchmarks(scale='small', seed=0, only=None):
+    """
+    Run the benchmarks (all of BENCHMARKS, or the names in only) on the data of a scale.
+    Returns a dict of results by benchmark name, with the scale and seed under 'settings'.
+    """
+    settings = SCALES[scale]
+    names = BENCHMARKS if only is None else [name for name in BENCHMARKS if name in only]
+    directory, price_path, loan_path = prepare_benchmark_data(scale, seed)
+    generator = np.random.default_rng(seed)
+
+    # Run from the data directory, where task-two.py finds its Nat_Gas.csv
+    previous_directory = os.getcwd()
+    os.chdir(directory)
+    try:
+        task_1 = load_task_module('task-1.py')
+        task_two = load_task_module('task-two.py')
+        task_2 = load_task_module('task-2.py')
+        task_3 = load_task_module('task-3.py')
+        task_4 = load_task_module('task-4.py')
+
+        results = {}
+        if any(name.startswith('price_gas_contract') for name in names):
+            contracts = generate_contract_book(settings['contracts'], settings['contract_dates'], seed)
+            contract_dates = 2 * settings['contract_dates']
+        if any(name in names for name in ('calculate_expected_loss', 'train_model', 'quantize_fico_scores')):
+            loans = pd.read_csv(loan_path)
+
+        for name in names:
+            if name == 'price_prediction_from_date':
+                offsets = generator.integers(0, 3650, settings['prediction_calls'])
+                dates = np.datetime_as_string(np.datetime64('2015-01-01') + offsets, unit='D').tolist()
+                results[name] = run_benchmark(lambda date: task_1.price_prediction_from_date(date, 'Nat_Gas.csv'),
+                                              [(date,) for date in dates])
+            elif name == 'price_gas_contract_model':
+                results[name] = run_benchmark(task_two.price_gas_contract,
+                                              [tuple(contract.values()) for contract in contracts], contract_dates)
+            elif name == 'price_gas_contract_csv':
+                results[name] = run_benchmark(lambda *contract: task_2.price_gas_contract('Nat_Gas.csv', *contract),
+                                              [tuple(contract.values()) for contract in contracts], contract_dates)
+            elif name == 'read_gas_data':
+                rows = len(task_2.read_gas_data('Nat_Gas.csv'))
+                results[name] = run_benchmark(task_2.read_gas_data, [('Nat_Gas.csv',)] * settings['read_calls'], rows)
+            elif name == 'calculate_expected_loss':
+                x, y, scaler = task_3.preprocess_data(loans.head(100000))
+                model = task_3.train_model(x, y)
+                sample = loans.sample(settings['expected_loss_calls'], random_state=seed)
+                cases = [(model, scaler, loan) for loan in sample[LOAN_FEATURES].to_dict('records')]
+                results[name] = run_benchmark(task_3.calculate_expected_loss, cases)
+            elif name == 'train_model':
+                x, y, _ = task_3.preprocess_data(loans)
+                results[name] = run_benchmark(task_3.train_model, [(x, y)] * settings['train_calls'], len(y))
+            elif name == 'quantize_fico_scores':
+                fico_scores = loans['fico_score'].values
+                results[name] = run_benchmark(task_4.quantize_fico_scores, [(fico_scores, 5, 0, 600)] * settings['quantize_calls'],
+                                              len(fico_scores))
+    finally:
+        os.chdir(previous_directory)
+
+    results['settings'] = {'scale': scale, 'seed': seed}
+    return results
+
+
+# Compare results with a baseline run
+def compare_with_baseline(results, baseline, tolerance=0.10):
+    """
+    Return one row per benchmark present in both runs with the ratio of the current p50
+    latency and throughput to the baseline's. A benchmark regresses when its p50 latency
+    grows, or its throughput falls, by more than tolerance.
+    """
+    rows = []
+    for name in BENCHMARKS:
+        if name not in results or name not in baseline:
+            continue
+        latency_ratio = results[name]['p50_ms'] / baseline[name]['p50_ms'] if baseline[name]['p50_ms'] else float('nan')
+        throughput_ratio = results[name]['throughput'] / baseline[name]['throughput'] if baseline[name]['throughput'] else float('nan')
+        rows.append({
+            'benchmark': name,
+            'p50_ratio': latency_ratio,
+            'throughput_ratio': throughput_ratio,
+            'regression': latency_ratio > 1 + tolerance or throughput_ratio < 1 / (1 + tolerance),
+        })
+    return rows
+
+
+# Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the task scripts on synthetic data.")
+    parser.add_argument('--scale', default='small', choices=list(SCALES), help="data sizes (default: small)")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the data generators")
+    parser.add_argument('--only', help="comma-separated benchmarks to run, from: " + ', '.join(BENCHMARKS))
+    parser.add_argument('--save', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="compare with the results saved in this JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="slowdown counted as a regression (default: 0.10)")
+    args = parser.parse_args(argv)
+
+    only = args.only.split(',') if args.only else None
+    results = run_benchmarks(args.scale, args.seed, only)
+
+    table = pd.DataFrame({name: result for name, result in results.items() if name != 'settings'}).T
+    print(table[['calls', 'items', 'throughput', 'cold_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'peak_memory_mb']].to_string(float_format='%.4g'))
+
+    if args.save:
+        with open(args.save, mode='w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if baseline.get('settings') != results['settings']:
+            print(f"\nWarning: baseline settings {baseline.get('settings')} differ from {results['settings']}")
+        comparison = pd.DataFrame(compare_with_baseline(results, baseline, args.tolerance))
+        print("\nComparison with baseline:")
+        print(comparison.to_string(index=False, float_format='%.3f'))
+        if comparison['regression'].any():
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
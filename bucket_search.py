@@ -0,0 +1,205 @@
+# FICO bucket configuration search
+# Evaluates many (split score, buckets below, buckets above) configurations of the equal-count bucketing
+# in task-4.py across a process pool and ranks them by MSE, log-likelihood and information criteria.
+# Every worker receives one copy of the prefix sums over the score histogram, and each candidate is
+# summarized with a few binary searches on them, so nothing is re-sorted per candidate:
+#
+#     python bucket_search.py --file "Task 3 and 4_Loan_Data.csv" --criterion bic
+
+# Some imports to be used throughout the bucket search
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from fico_quantization import FicoHistogram
+
+# Criteria that can rank the candidates, and whether a higher value is better
+CRITERIA = {'mse': False, 'log_likelihood': True, 'aic': False, 'bic': False}
+
+# Prefix sums shared by every candidate evaluated in this process, set by _share_prefix
+_shared_prefix = None
+
+
+# Prefix sums over every integer score, so the borrowers up to any sorted position are summarized in O(log n)
+def dense_prefix_sums(histogram):
+    """
+    Return prefix sums of the counts, scores, squared scores and defaults of a FicoHistogram
+    over all scores 0..max_score, each with a leading zero.
+    """
+    n = histogram.counts.astype(np.float64)
+    s = histogram.scores
+    return {
+        'count': np.concatenate([[0.0], np.cumsum(n)]),
+        'sum': np.concatenate([[0.0], np.cumsum(n * s)]),
+        'sum_squares': np.concatenate([[0.0], np.cumsum(n * s * s)]),
+        'defaults': np.concatenate([[0.0], np.cumsum(histogram.default_counts)]),
+    }
+
+
+# Sums over the first `positions` borrowers in score order, splitting a score's borrowers pro rata
+def position_sums(prefix, positions):
+    cumulative = prefix['count']
+    score = np.clip(np.searchsorted(cumulative, positions, side='right') - 1, 0, len(cumulative) - 2)
+    partial = positions - cumulative[score]
+    borrowers = cumulative[score + 1] - cumulative[score]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        default_rate = np.where(borrowers > 0, (prefix['defaults'][score + 1] - prefix['defaults'][score]) / borrowers, 0.0)
+    return {
+        'count': positions.astype(np.float64),
+        'sum': prefix['sum'][score] + partial * score,
+        'sum_squares': prefix['sum_squares'][score] + partial * score * score,
+        'defaults': prefix['defaults'][score] + partial * default_rate,
+    }
+
+
+# Sorted positions of the equal-count bucket edges of task-4.py over the scores lower_bound..upper_bound
+def equal_count_edges(prefix, num_buckets, lower_bound, upper_bound):
+    start = prefix['count'][lower_bound]
+    total = prefix['count'][upper_bound + 1] - start
+    bucket_size = total // num_buckets
+    edges = start + bucket_size * np.arange(num_buckets + 1)
+    edges[-1] = start + total
+    return edges
+
+
+# Evaluate one candidate configuration on the prefix sums
+def evaluate_candidate(prefix, split_score, buckets_below, buckets_above):
+    """
+    Quality of equal-count buckets with buckets_below buckets over the scores below split_score
+    and buckets_above buckets over split_score and above.
+
+    Returns a dict with the configuration, the (lowest, highest) score of every bucket,
+    the overall MSE of the scores around their bucket means, the log-likelihood of the
+    defaults with one default rate per bucket, and the AIC and BIC of that likelihood
+    with one parameter per bucket. Returns None when a bucket would be empty.
+    """
+    max_score = len(prefix['count']) - 2
+    edges = np.concatenate([
+        equal_count_edges(prefix, buckets_below, 0, split_score - 1),
+        equal_count_edges(prefix, buckets_above, split_score, max_score)[1:],
+    ])
+    sums = position_sums(prefix, edges)
+    n = np.diff(sums['count'])
+    if np.any(n <= 0):
+        return None
+
+    total = np.diff(sums['sum'])
+    squared_error = np.diff(sums['sum_squares']) - total * total / n
+    k = np.diff(sums['defaults'])
+    p = k / n
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_likelihood = float((np.where(k > 0, k * np.log(p), 0.0) + np.where(n - k > 0, (n - k) * np.log1p(-p), 0.0)).sum())
+
+    # First and last score present in every bucket
+    first = np.searchsorted(prefix['count'], edges[:-1], side='right') - 1
+    last = np.searchsorted(prefix['count'], edges[1:], side='left') - 1
+    num_buckets = buckets_below + buckets_above
+    borrowers = float(n.sum())
+    return {
+        'split_score': split_score,
+        'buckets_below': buckets_below,
+        'buckets_above': buckets_above,
+        'num_buckets': num_buckets,
+        'boundaries': list(zip(first.tolist(), last.tolist())),
+        'mse': float(max(squared_error.sum(), 0.0) / borrowers),
+        'log_likelihood': log_likelihood,
+        'aic': 2 * num_buckets - 2 * log_likelihood,
+        'bic': num_buckets * np.log(borrowers) - 2 * log_likelihood,
+    }
+
+
+# Pool initializer: keep one copy of the prefix sums per worker process
+def _share_prefix(prefix):
+    global _shared_prefix
+    _shared_prefix = prefix
+
+
+# Worker task: evaluate a batch of candidates on the shared prefix sums
+def _evaluate_batch(candidates):
+    return [evaluate_candidate(_shared_prefix, *candidate) for candidate in candidates]
+
+
+# Rank evaluated candidates, best first
+def rank_candidates(results, criterion='bic'):
+    if criterion not in CRITERIA:
+        raise ValueError(f"Unknown criterion {criterion!r}, expected one of {list(CRITERIA)}")
+    table = pd.DataFrame(results)
+    return table.sort_values(criterion, ascending=not CRITERIA[criterion], kind='stable').reset_index(drop=True)
+
+
+# Function to search bucket counts and split points for the FICO buckets
+def search_fico_buckets(fico_scores, defaults=None, bucket_counts=range(1, 11), split_scores=range(500, 701, 10),
+                        criterion='bic', max_workers=None, batch_size=256):
+    """
+    Search the equal-count bucketing of task-4.py over every split score and every pair of
+    bucket counts below and above it.
+
+    Unlike task-4.py, whose two ranges both include the split score, the borrowers at the
+    split score belong to the upper range only, so every candidate buckets each borrower
+    exactly once and the candidates are comparable.
+
+    Parameters:
+    - fico_scores (array or FicoHistogram): Scores of the borrowers, or their histogram with defaults.
+    - defaults (array): 0/1 defaults of the borrowers, needed for the likelihood-based criteria.
+    - bucket_counts (iterable of int): Numbers of buckets tried below and above the split.
+    - split_scores (iterable of int): Split scores tried.
+    - criterion (str): 'mse', 'log_likelihood', 'aic' or 'bic' used to pick the best candidate.
+    - max_workers (int): Number of worker processes, 1 runs everything in the current process.
+    - batch_size (int): Number of candidates evaluated by one task.
+
+    Returns:
+    - dict: 'best', the best candidate; 'candidates', a DataFrame of every feasible candidate
+      ranked by the criterion; 'trade_off', the best candidate for every total number of buckets.
+    """
+    if isinstance(fico_scores, FicoHistogram):
+        histogram = fico_scores
+    else:
+        histogram = FicoHistogram.from_scores(fico_scores, defaults)
+    if criterion != 'mse' and defaults is None and not isinstance(fico_scores, FicoHistogram):
+        raise ValueError(f"The {criterion} criterion needs the defaults of the borrowers")
+    prefix = dense_prefix_sums(histogram)
+
+    candidates = [(int(split), int(below), int(above))
+                  for split, below, above in itertools.product(split_scores, bucket_counts, bucket_counts)
+                  if 0 < split <= histogram.max_score]
+    batches = [candidates[i:i + batch_size] for i in range(0, len(candidates), batch_size)]
+
+    if max_workers == 1:
+        _share_prefix(prefix)
+        results = [_evaluate_batch(batch) for batch in batches]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_share_prefix, initargs=(prefix,)) as executor:
+            results = list(executor.map(_evaluate_batch, batches))
+    results = [result for batch in results for result in batch if result is not None]
+    if not results:
+        raise ValueError("No candidate leaves every bucket with at least one borrower")
+
+    ranked = rank_candidates(results, criterion)
+    trade_off = ranked.drop_duplicates('num_buckets').sort_values('num_buckets').reset_index(drop=True)
+    return {'best': ranked.iloc[0].to_dict(), 'candidates': ranked, 'trade_off': trade_off}
+
+
+# Command line entry point printing the best configuration and the trade-off curve
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search bucket counts and split scores for the FICO buckets.")
+    parser.add_argument('--file', default='Task 3 and 4_Loan_Data.csv', help="loan CSV file (default: Task 3 and 4_Loan_Data.csv)")
+    parser.add_argument('--criterion', default='bic', choices=list(CRITERIA))
+    parser.add_argument('--max-buckets', type=int, default=10, help="most buckets on each side of the split")
+    parser.add_argument('--workers', type=int, default=None, help="number of worker processes")
+    args = parser.parse_args(argv)
+
+    histogram = FicoHistogram.from_csv(args.file)
+    search = search_fico_buckets(histogram, bucket_counts=range(1, args.max_buckets + 1), criterion=args.criterion, max_workers=args.workers)
+    best = search['best']
+    print(f"Best by {args.criterion}: split at {best['split_score']}, {best['buckets_below']} buckets below "
+          f"and {best['buckets_above']} above")
+    print(f"Bucket Boundaries: {best['boundaries']}")
+    print(f"\nTrade-off curve:")
+    print(search['trade_off'][['num_buckets', 'split_score', 'buckets_below', 'buckets_above', 'mse', 'log_likelihood', 'aic', 'bic']].to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
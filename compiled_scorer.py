@@ -0,0 +1,92 @@
+# Dependency-free compiled credit scorer
+# Folds the StandardScaler fitted in preprocess_data into the LogisticRegression weights and intercept,
+# so scoring a loan is one dot product and a sigmoid. Loading and scoring only need numpy.
+
+# Some imports to be used throughout the compiled scorer
+import math
+
+import numpy as np
+
+# Model features, in the order the scaler and model were fitted on
+LOAN_FEATURES = ['credit_lines_outstanding', 'loan_amt_outstanding', 'total_debt_outstanding', 'income', 'years_employed', 'fico_score']
+
+
+class CompiledLoanScorer:
+    """
+    Logistic default model on raw (unscaled) loan features with a fixed feature order.
+    """
+
+    def __init__(self, weights, intercept, features=LOAN_FEATURES):
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.features = list(features)
+        # Plain Python copies of the weights for the single-loan path, which avoids numpy call overhead
+        self.weight_list = self.weights.tolist()
+        self.loan_amt_index = self.features.index('loan_amt_outstanding')
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a scorer saved with save.
+        """
+        with np.load(path, allow_pickle=False) as artifact:
+            return cls(artifact['weights'], float(artifact['intercept']), artifact['features'].tolist())
+
+    def save(self, path):
+        """
+        Save the weights, intercept and feature order as a small .npz file.
+        """
+        np.savez(path, weights=self.weights, intercept=np.float64(self.intercept), features=np.array(self.features))
+
+    def probability_of_default(self, loan_details):
+        """
+        Predict the probability of default (PD) of one loan given as a dict of features.
+        """
+        logit = self.intercept
+        for weight, feature in zip(self.weight_list, self.features):
+            logit += weight * loan_details[feature]
+        # Numerically stable sigmoid
+        if logit >= 0:
+            return 1.0 / (1.0 + math.exp(-logit))
+        odds = math.exp(logit)
+        return odds / (1.0 + odds)
+
+    def probabilities_of_default(self, x):
+        """
+        Predict the probability of default of every row of a 2-D array whose columns follow self.features.
+        """
+        logits = np.asarray(x, dtype=np.float64) @ self.weights + self.intercept
+        return np.exp(-np.logaddexp(0.0, -logits))
+
+    def expected_loss(self, loan_details, recovery_rate=0.10):
+        """
+        Calculate the expected loss of one loan: PD × Loan Amount × (1 − Recovery Rate).
+        """
+        return self.probability_of_default(loan_details) * loan_details['loan_amt_outstanding'] * (1 - recovery_rate)
+
+    def expected_losses(self, x, recovery_rate=0.10):
+        """
+        Calculate the expected loss of every row of a 2-D array whose columns follow self.features.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        return self.probabilities_of_default(x) * x[:, self.loan_amt_index] * (1 - recovery_rate)
+
+
+# Export step: fold the scaler into the model
+def compile_loan_scorer(model, scaler, features=None):
+    """
+    Build a CompiledLoanScorer from a fitted StandardScaler and binary LogisticRegression.
+
+    With z = (x - mean) / scale, the logit w·z + b equals (w / scale)·x + (b - Σ w·mean / scale),
+    so the scaler disappears into the weights and intercept.
+    """
+    if features is None:
+        features = getattr(scaler, 'feature_names_in_', LOAN_FEATURES)
+
+    weights = model.coef_[0]
+    mean = scaler.mean_ if scaler.with_mean else np.zeros_like(weights)
+    scale = scaler.scale_ if scaler.with_std else np.ones_like(weights)
+
+    folded_weights = weights / scale
+    folded_intercept = model.intercept_[0] - np.dot(folded_weights, mean)
+    return CompiledLoanScorer(folded_weights, folded_intercept, features)
@@ -0,0 +1,146 @@
+# Portfolio credit loss distribution
+# Simulates correlated defaults of a whole loan book with a one-factor Gaussian copula: loan i defaults
+# when sqrt(rho) * Z + sqrt(1 - rho) * e_i falls below the normal quantile of its probability of default,
+# with one systematic factor Z per scenario. PDs come from the task-3.py model, exposures from
+# loan_amt_outstanding. Scenarios are simulated in scenario x loan blocks sized to a memory budget,
+# in seeded chunks across a process pool.
+
+# Some imports to be used throughout the loss engine
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.special import ndtri
+
+from loan_scoring import score_loans
+from seeded_chunks import seeded_chunk_plan
+
+# Bytes held per (scenario, loan) pair of a block: one float32 draw, overwritten by its 0/1 default flag
+BYTES_PER_DRAW = 4
+
+
+# Worker task: portfolio losses of one chunk of scenarios
+def _loss_chunk(seed, num_scenarios, default_thresholds, loss_given_default, correlation, loan_block):
+    generator = np.random.default_rng(seed)
+    factor = generator.standard_normal(num_scenarios)
+
+    # Loan i defaults when e_i < (threshold_i - sqrt(rho) * Z) / sqrt(1 - rho)
+    idiosyncratic_scale = np.sqrt(1.0 - correlation)
+    shifted_factor = (np.sqrt(correlation) * factor / idiosyncratic_scale).astype(np.float32)
+    scaled_thresholds = (default_thresholds / idiosyncratic_scale).astype(np.float32)
+    losses_given_default = loss_given_default.astype(np.float32)
+
+    # One draw buffer reused by every block, so a block never coexists with the previous one
+    losses = np.zeros(num_scenarios)
+    buffer = np.empty(num_scenarios * min(loan_block, len(default_thresholds)), dtype=np.float32)
+    for start in range(0, len(default_thresholds), loan_block):
+        end = min(start + loan_block, len(default_thresholds))
+        draws = buffer[:num_scenarios * (end - start)].reshape(num_scenarios, end - start)
+        generator.standard_normal(dtype=np.float32, out=draws)
+        draws += shifted_factor[:, None]
+        # Write the default flags over the draws, so the dot product needs no float copy of a boolean block
+        np.less(draws, scaled_thresholds[start:end], out=draws)
+        losses += np.dot(draws, losses_given_default[start:end])
+    return losses
+
+
+# Function to simulate the loss of every scenario
+def simulate_portfolio_losses(probability_of_default, exposure, correlation=0.15, num_scenarios=100000, recovery_rate=0.10,
+                              chunk_size=2000, memory_budget=256 * 2 ** 20, seed=0, max_workers=None):
+    """
+    Simulate the total credit loss of a loan book under a one-factor Gaussian copula.
+
+    Parameters:
+    - probability_of_default (array): PD of every loan.
+    - exposure (array): Exposure at default of every loan, its loan_amt_outstanding.
+    - correlation (float): Asset correlation rho of every loan with the systematic factor.
+    - num_scenarios (int): Number of simulated scenarios.
+    - recovery_rate (float): Share of the exposure recovered after a default.
+    - chunk_size (int): Number of scenarios simulated together by one task.
+    - memory_budget (int): Bytes of random draws one task may hold at a time, which sets how
+      many loans are simulated together.
+    - seed (int): Seed of the random streams; results depend on it, chunk_size and
+      memory_budget, but not on the number of workers.
+    - max_workers (int): Number of worker processes, 1 runs everything in the current process.
+
+    Returns:
+    - numpy.ndarray: The portfolio loss of every scenario.
+    """
+    probability_of_default = np.asarray(probability_of_default, dtype=np.float64)
+    exposure = np.asarray(exposure, dtype=np.float64)
+    if probability_of_default.shape != exposure.shape:
+        raise ValueError("probability_of_default and exposure must have one entry per loan")
+    if not 0.0 <= correlation < 1.0:
+        raise ValueError(f"Correlation must be in [0, 1), got {correlation}")
+
+    # A PD of 0 never defaults and a PD of 1 always does
+    default_thresholds = ndtri(np.clip(probability_of_default, 0.0, 1.0))
+    loss_given_default = exposure * (1 - recovery_rate)
+
+    chunk_size = min(chunk_size, num_scenarios)
+    loan_block = int(max(1, min(len(exposure), memory_budget // (BYTES_PER_DRAW * chunk_size))))
+    plan = seeded_chunk_plan(num_scenarios, chunk_size, seed)
+    args = (default_thresholds, loss_given_default, correlation, loan_block)
+
+    if max_workers == 1:
+        results = [_loss_chunk(chunk_seed, size, *args) for chunk_seed, size in plan]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_loss_chunk, chunk_seed, size, *args) for chunk_seed, size in plan]
+            results = [future.result() for future in futures]
+    return np.concatenate(results)
+
+
+# Summarize a simulated loss distribution
+def loss_distribution_summary(losses, expected_loss=None, confidence_levels=(0.95, 0.99, 0.999)):
+    """
+    Mean, standard deviation and quantiles of the simulated losses, with the value at risk
+    (the loss quantile) and the expected shortfall (the mean loss beyond it) at every
+    confidence level. The unexpected loss is the VaR minus the expected loss, which is the
+    analytic one when given and the simulated mean otherwise.
+    """
+    losses = np.sort(np.asarray(losses, dtype=np.float64))
+    mean = float(losses.mean())
+    if expected_loss is None:
+        expected_loss = mean
+
+    value_at_risk = {}
+    expected_shortfall = {}
+    unexpected_loss = {}
+    for level in confidence_levels:
+        var = float(np.quantile(losses, level))
+        value_at_risk[level] = var
+        expected_shortfall[level] = float(losses[np.searchsorted(losses, var, side='left'):].mean())
+        unexpected_loss[level] = var - expected_loss
+
+    return {
+        'scenarios': len(losses),
+        'expected_loss': float(expected_loss),
+        'mean_loss': mean,
+        'standard_deviation': float(losses.std()),
+        'quantiles': {level: float(np.quantile(losses, level)) for level in (0.5, 0.75, 0.9) + tuple(confidence_levels)},
+        'value_at_risk': value_at_risk,
+        'expected_shortfall': expected_shortfall,
+        'unexpected_loss': unexpected_loss,
+    }
+
+
+# Function to compute the loss distribution of a loan book with the task-3.py model
+def portfolio_loss_distribution(model, scaler, loans, correlation=0.15, num_scenarios=100000, recovery_rate=0.10,
+                                confidence_levels=(0.95, 0.99, 0.999), **simulation_options):
+    """
+    Score every loan of a DataFrame with the fitted model and scaler, simulate the loss
+    distribution of the book and summarize it (see simulate_portfolio_losses and
+    loss_distribution_summary). Loans with a missing feature are left out.
+
+    Returns the summary dict, with the simulated 'losses' of every scenario.
+    """
+    probability_of_default, expected_loss = score_loans(model, scaler, loans, recovery_rate)
+    scored = ~np.isnan(probability_of_default)
+    exposure = loans['loan_amt_outstanding'].to_numpy(dtype=np.float64)[scored]
+
+    losses = simulate_portfolio_losses(probability_of_default[scored], exposure, correlation, num_scenarios,
+                                       recovery_rate, **simulation_options)
+    summary = loss_distribution_summary(losses, float(expected_loss[scored].sum()), confidence_levels)
+    summary['loans'] = int(scored.sum())
+    summary['losses'] = losses
+    return summary
@@ -0,0 +1,335 @@
+# Optimal FICO score bucketing
+# Chooses bucket boundaries that minimize the total squared error of the scores, or maximize the
+# log-likelihood of the defaults, with a dynamic program over the histogram of distinct scores.
+# After one bincount over the borrowers, the cost no longer depends on how many borrowers there are.
+
+# Some imports to be used throughout the quantizer
+import numpy as np
+
+# Highest possible FICO score
+MAX_FICO_SCORE = 850
+
+
+class FicoHistogram:
+    """
+    Borrower and default counts at every integer FICO score.
+
+    Memory is proportional to the score range, not to the number of borrowers, and counts
+    can be accumulated chunk by chunk. Bucket statistics are computed from per-score
+    weights, so a bucket may hold only part of the borrowers at a score, as the
+    equal-count buckets of quantize_fico_scores do.
+    """
+
+    def __init__(self, max_score=MAX_FICO_SCORE):
+        self.max_score = max_score
+        self.scores = np.arange(max_score + 1, dtype=np.float64)
+        self.counts = np.zeros(max_score + 1, dtype=np.int64)
+        self.default_counts = np.zeros(max_score + 1, dtype=np.float64)
+
+    @classmethod
+    def from_scores(cls, fico_scores, defaults=None, max_score=MAX_FICO_SCORE):
+        """
+        Build the histogram of an array of scores (and their 0/1 defaults).
+        """
+        return cls(max_score).add(fico_scores, defaults)
+
+    @classmethod
+    def from_csv(cls, file_path, chunk_size=1000000, score_column='fico_score', default_column='default', max_score=MAX_FICO_SCORE):
+        """
+        Build the histogram of a loan CSV file, reading it chunk by chunk.
+        """
+        import pandas as pd
+
+        histogram = cls(max_score)
+        for chunk in pd.read_csv(file_path, usecols=[score_column, default_column], chunksize=chunk_size):
+            chunk = chunk.dropna()
+            histogram.add(chunk[score_column].to_numpy(), chunk[default_column].to_numpy())
+        return histogram
+
+    def add(self, fico_scores, defaults=None):
+        """
+        Add a chunk of scores (and their 0/1 defaults) with one bincount each.
+        """
+        fico_scores = np.asarray(fico_scores).astype(np.int64)
+        self.counts += np.bincount(fico_scores, minlength=self.max_score + 1)
+        if defaults is not None:
+            self.default_counts += np.bincount(fico_scores, weights=np.asarray(defaults, dtype=np.float64), minlength=self.max_score + 1)
+        return self
+
+    def range_weights(self, lower_bound, upper_bound):
+        """
+        Borrowers per score for the scores lower_bound..upper_bound (inclusive).
+        """
+        weights = np.zeros_like(self.counts)
+        lower_bound = max(int(np.ceil(lower_bound)), 0)
+        upper_bound = min(int(np.floor(upper_bound)), self.max_score)
+        weights[lower_bound:upper_bound + 1] = self.counts[lower_bound:upper_bound + 1]
+        return weights
+
+    def position_weights(self, weights, start, end):
+        """
+        Borrowers per score for the sorted positions start..end-1 of the borrowers in weights.
+        """
+        cumulative = np.concatenate([[0], np.cumsum(weights)])
+        return np.clip(cumulative[1:], start, end) - np.clip(cumulative[:-1], start, end)
+
+    def statistics(self, weights):
+        """
+        Count, lowest and highest score, mean, MSE and default rate of the borrowers in weights.
+        Defaults of a score that is only partly in the bucket are counted pro rata.
+        """
+        count = int(weights.sum())
+        if count == 0:
+            return {'count': 0, 'first': None, 'last': None, 'mean': float('nan'), 'mse': float('nan'), 'default_rate': float('nan')}
+        present = np.flatnonzero(weights)
+        mean = np.dot(weights, self.scores) / count
+        mse = np.dot(weights, (self.scores - mean) ** 2) / count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            defaults = np.where(self.counts > 0, self.default_counts * weights / self.counts, 0.0).sum()
+        return {'count': count, 'first': int(present[0]), 'last': int(present[-1]), 'mean': mean, 'mse': mse, 'default_rate': defaults / count}
+
+    def range_bucket_statistics(self, bucket_boundaries):
+        """
+        Statistics of the buckets given as (lowest, highest) score pairs.
+        """
+        return [self.statistics(self.range_weights(lower, upper)) for lower, upper in bucket_boundaries]
+
+    def equal_count_buckets(self, num_buckets, lower_bound=0, upper_bound=MAX_FICO_SCORE):
+        """
+        Statistics of num_buckets buckets with len // num_buckets borrowers each (the last one takes
+        the rest), over the sorted scores in lower_bound..upper_bound.
+        """
+        weights = self.range_weights(lower_bound, upper_bound)
+        total = int(weights.sum())
+        bucket_size = total // num_buckets
+        buckets = []
+        for i in range(num_buckets):
+            end = (i + 1) * bucket_size if i < num_buckets - 1 else total
+            buckets.append(self.statistics(self.position_weights(weights, i * bucket_size, end)))
+        return buckets
+
+
+# Prefix sums over the distinct scores, so any run of consecutive scores is summarized in O(1)
+def histogram_prefix_sums(counts, default_counts):
+    """
+    Return the distinct scores and the prefix sums of their counts, scores, squared scores and defaults,
+    each with a leading zero so the run of distinct scores i..j-1 is prefix[j] - prefix[i].
+    """
+    scores = np.flatnonzero(counts)
+    n = counts[scores].astype(np.float64)
+    s = scores.astype(np.float64)
+    prefix = {
+        'count': np.concatenate([[0.0], np.cumsum(n)]),
+        'sum': np.concatenate([[0.0], np.cumsum(n * s)]),
+        'sum_squares': np.concatenate([[0.0], np.cumsum(n * s * s)]),
+        'defaults': np.concatenate([[0.0], np.cumsum(np.asarray(default_counts, dtype=np.float64)[scores])]),
+    }
+    return scores, prefix
+
+
+# Cost of putting the distinct scores starts..end-1 in one bucket, for an array of starts
+def segment_costs(prefix, starts, end, objective='mse'):
+    """
+    Vectorized bucket cost: the sum of squared errors around the bucket mean for 'mse',
+    or the negative log-likelihood of the bucket's defaults for 'log_likelihood'.
+    """
+    n = prefix['count'][end] - prefix['count'][starts]
+    if objective == 'mse':
+        total = prefix['sum'][end] - prefix['sum'][starts]
+        return (prefix['sum_squares'][end] - prefix['sum_squares'][starts]) - total * total / n
+    if objective == 'log_likelihood':
+        k = prefix['defaults'][end] - prefix['defaults'][starts]
+        p = k / n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_likelihood = np.where(k > 0, k * np.log(p), 0.0) + np.where(n - k > 0, (n - k) * np.log1p(-p), 0.0)
+        return -log_likelihood
+    raise ValueError(f"Unknown objective {objective!r}, expected 'mse' or 'log_likelihood'")
+
+
+# One layer of the dynamic program with the divide-and-conquer (monotone split point) optimization
+def _divide_and_conquer_layer(previous, prefix, layer, num_positions, objective):
+    current = np.full(num_positions + 1, np.inf)
+    split = np.zeros(num_positions + 1, dtype=np.int64)
+
+    # Each entry: (first end, last end, lowest split, highest split) still to solve
+    stack = [(layer, num_positions, layer - 1, num_positions - 1)]
+    while stack:
+        low, high, split_low, split_high = stack.pop()
+        if low > high:
+            continue
+        middle = (low + high) // 2
+        starts = np.arange(split_low, min(middle - 1, split_high) + 1)
+        candidates = previous[starts] + segment_costs(prefix, starts, middle, objective)
+        best = int(np.argmin(candidates))
+        current[middle] = candidates[best]
+        split[middle] = starts[best]
+        # The best split point never moves left as the end moves right
+        stack.append((low, middle - 1, split_low, split[middle]))
+        stack.append((middle + 1, high, split[middle], split_high))
+    return current, split
+
+
+# Cost of every (start, end) pair of distinct-score positions, infinite where start >= end
+def segment_cost_matrix(prefix, num_positions, objective='mse'):
+    positions = np.arange(num_positions + 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        matrix = segment_costs(prefix, positions[:, None], positions[None, :], objective)
+    matrix[positions[:, None] >= positions[None, :]] = np.inf
+    return matrix
+
+
+# One layer of the dynamic program checking every split point at once on the dense cost matrix
+def _exhaustive_layer(previous, cost_matrix):
+    candidates = previous[:, None] + cost_matrix
+    split = np.argmin(candidates, axis=0)
+    return candidates[split, np.arange(len(previous))], split
+
+
+# Function to choose the optimal FICO buckets from a histogram
+def optimal_histogram_buckets(histogram, num_buckets, objective='mse', method='auto'):
+    """
+    Split the scores of a FicoHistogram into num_buckets contiguous buckets that minimize the
+    total squared error of the scores around their bucket means (objective='mse') or maximize
+    the log-likelihood of the defaults (objective='log_likelihood').
+
+    The dynamic program runs over the ~550 distinct scores with prefix sums. The squared
+    error cost satisfies the quadrangle inequality, so its best split points are monotone
+    and method='divide_and_conquer' solves each layer in O(n log n). The log-likelihood
+    cost carries no such guarantee, so it checks every split point on a dense n x n cost
+    matrix (method='exhaustive'). method='auto' picks the exact choice for the objective.
+
+    Returns the (lowest, highest) score of every bucket.
+    """
+    if method == 'auto':
+        method = 'divide_and_conquer' if objective == 'mse' else 'exhaustive'
+    if method not in ('divide_and_conquer', 'exhaustive'):
+        raise ValueError(f"Unknown method {method!r}, expected 'auto', 'divide_and_conquer' or 'exhaustive'")
+
+    scores, prefix = histogram_prefix_sums(histogram.counts, histogram.default_counts)
+    num_positions = len(scores)
+    if not 1 <= num_buckets <= num_positions:
+        raise ValueError(f"Cannot make {num_buckets} buckets from {num_positions} distinct scores")
+
+    if method == 'exhaustive':
+        cost_matrix = segment_cost_matrix(prefix, num_positions, objective)
+
+    # cost[j] is the best cost of the first j distinct scores in `layer` buckets
+    cost = np.full(num_positions + 1, np.inf)
+    cost[0] = 0.0
+    splits = []
+    for layer in range(1, num_buckets + 1):
+        if method == 'exhaustive':
+            cost, split = _exhaustive_layer(cost, cost_matrix)
+        else:
+            cost, split = _divide_and_conquer_layer(cost, prefix, layer, num_positions, objective)
+        splits.append(split)
+
+    # Walk the split points back from the last distinct score
+    edges = [num_positions]
+    for split in reversed(splits):
+        edges.append(int(split[edges[-1]]))
+    edges.reverse()
+    return [(int(scores[start]), int(scores[end - 1])) for start, end in zip(edges[:-1], edges[1:])]
+
+
+# Function to choose the optimal FICO buckets
+def optimal_fico_buckets(fico_scores, num_buckets, defaults=None, objective='mse', method='auto', max_score=MAX_FICO_SCORE):
+    """
+    Optimal buckets of an array of scores (see optimal_histogram_buckets); fico_scores may
+    also be a FicoHistogram accumulated over file chunks. The log_likelihood objective
+    needs the defaults of the borrowers.
+
+    Returns the same lists as quantize_fico_scores in task-4.py: the (lowest, highest)
+    score of every bucket, the bucket means and the per-bucket MSE.
+    """
+    if isinstance(fico_scores, FicoHistogram):
+        histogram = fico_scores
+    else:
+        histogram = FicoHistogram.from_scores(fico_scores, defaults, max_score)
+    if objective == 'log_likelihood' and defaults is None and not isinstance(fico_scores, FicoHistogram):
+        raise ValueError("The log_likelihood objective needs the defaults of the borrowers")
+
+    bucket_boundaries = optimal_histogram_buckets(histogram, num_buckets, objective, method)
+    buckets = histogram.range_bucket_statistics(bucket_boundaries)
+    return bucket_boundaries, [bucket['mean'] for bucket in buckets], [bucket['mse'] for bucket in buckets]
+
+
+class RatingMap:
+    """
+    Dense score-to-rating lookup table: ratings[score] is the rating of every FICO score from 0
+    to max_score, with rating 1 for the highest-score bucket (a lower rating means a better
+    credit score), plus the probability of default observed for each rating. Millions of
+    scores map to ratings or PDs with one fancy-indexing operation.
+    """
+
+    def __init__(self, ratings, probability_of_default):
+        """
+        - ratings (numpy.ndarray): int8 rating of every score, indexed by score.
+        - probability_of_default (numpy.ndarray): PD of every rating, indexed by rating (entry 0 unused).
+        """
+        self.ratings = np.asarray(ratings, dtype=np.int8)
+        self.probability_of_default = np.asarray(probability_of_default, dtype=np.float64)
+        self.num_ratings = len(self.probability_of_default) - 1
+
+    @classmethod
+    def from_boundaries(cls, bucket_boundaries, histogram):
+        """
+        Build the map from ascending (lowest, highest) bucket boundaries and the FicoHistogram
+        (with defaults) the buckets were fitted on. Scores in the gap between two buckets get
+        the rating of the lower bucket, scores below the first or above the last bucket get
+        the rating of the nearest bucket. Buckets sharing a lower edge, which the overlapping
+        chunks of task-4.py can produce, are merged into one rating, since only the last of
+        them would get any scores.
+        """
+        lower_edges = np.array([lower for lower, _ in bucket_boundaries])
+        if np.any(np.diff(lower_edges) < 0):
+            raise ValueError(f"Bucket lower edges must be ascending, got {lower_edges.tolist()}")
+        lower_edges = np.unique(lower_edges)
+        num_buckets = len(lower_edges)
+        if not 1 <= num_buckets <= np.iinfo(np.int8).max:
+            raise ValueError(f"Cannot store {num_buckets} ratings in an int8 map")
+
+        # Bucket index of every score from the lower edge of the buckets
+        bucket_index = np.clip(np.searchsorted(lower_edges, np.arange(histogram.max_score + 1), side='right') - 1, 0, num_buckets - 1)
+        ratings = (num_buckets - bucket_index).astype(np.int8)
+
+        # Observed default rate of each rating
+        borrowers = np.bincount(ratings, weights=histogram.counts, minlength=num_buckets + 1)
+        defaults = np.bincount(ratings, weights=histogram.default_counts, minlength=num_buckets + 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            probability_of_default = np.where(borrowers > 0, defaults / borrowers, np.nan)
+        return cls(ratings, probability_of_default)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a rating map saved with save, without recomputing the quantization.
+        """
+        with np.load(path, allow_pickle=False) as artifact:
+            return cls(artifact['ratings'], artifact['probability_of_default'])
+
+    def save(self, path):
+        """
+        Save the lookup table and per-rating PD as a small .npz file.
+        """
+        np.savez(path, ratings=self.ratings, probability_of_default=self.probability_of_default)
+
+    def map_scores(self, fico_scores):
+        """
+        Rating of every score in an array.
+        """
+        return self.ratings[np.clip(np.asarray(fico_scores).astype(np.int64), 0, len(self.ratings) - 1)]
+
+    def score_probability_of_default(self, fico_scores):
+        """
+        Observed PD of the rating of every score in an array.
+        """
+        return self.probability_of_default[self.map_scores(fico_scores)]
+
+    def add_rating_column(self, df, score_column='fico_score', rating_column='fico_rating'):
+        """
+        Return a copy of a DataFrame with the rating of its score column added.
+        """
+        df = df.copy()
+        df[rating_column] = self.map_scores(df[score_column].to_numpy())
+        return df
@@ -0,0 +1,165 @@
+# Daily forward curve for natural gas prices
+# Built once from the Nat_Gas.csv month-end prices plus the shared linear trend model of gas_forecast,
+# then shared by every pricing call until a new trend model is published for the file
+
+# Various imports to be used for loading the price history and building the curve
+import os
+
+import numpy as np
+
+from gas_forecast import PriceTrendModel, load_price_model
+from instrumentation import count, span
+from price_store import dates_to_ordinals, load_price_store
+
+# Cache of curves that have already been built, keyed by the absolute path of their source file
+_forward_curves = {}
+
+
+# Helper function to load the CSV data as day ordinals and prices
+def read_price_history(file_path):
+    """
+    Reads month-end gas prices from a CSV file into numpy arrays, through the binary price store.
+
+    Inputs:
+    - file_path (str): The path to the CSV file.
+
+    Outputs:
+    - ordinals (numpy.ndarray): int64 day ordinal of each record.
+    - prices (numpy.ndarray): float64 price of each record.
+    """
+    return load_price_store(file_path)
+
+
+class ForwardCurve:
+    """
+    Natural gas forward curve stored as one contiguous daily price array indexed by day ordinal.
+
+    Prices between two recorded month-ends are linearly interpolated. Prices before the first
+    and after the last recorded month-end come from the trend model of gas_forecast, the same
+    model used to extrapolate prices in task-1.py and task-two.py. Lookups within the stored
+    array are a single array index; dates beyond it are evaluated with the trend model.
+    """
+
+    def __init__(self, first_ordinal, daily_prices, trend_model):
+        """
+        Inputs:
+        - first_ordinal (int): Day ordinal of the first entry in daily_prices.
+        - daily_prices (numpy.ndarray): Price for every consecutive day starting at first_ordinal.
+        - trend_model (PriceTrendModel): Model pricing the days before and after daily_prices.
+        """
+        self.first_ordinal = int(first_ordinal)
+        self.daily_prices = np.ascontiguousarray(daily_prices, dtype=np.float64)
+        self.last_ordinal = self.first_ordinal + len(self.daily_prices) - 1
+        self.trend_model = trend_model
+
+    @classmethod
+    def from_history(cls, ordinals, prices, extrapolation_days=365, trend_model=None):
+        """
+        Builds the daily curve from recorded prices and the trend extrapolated around them.
+
+        Inputs:
+        - ordinals (numpy.ndarray): Day ordinals of the recorded prices, in ascending order.
+        - prices (numpy.ndarray): Recorded prices.
+        - extrapolation_days (int): Number of days of trend prices stored before the first and after the last record.
+        - trend_model (PriceTrendModel): Trend used outside the records, fitted to them if not given.
+
+        Outputs:
+        - ForwardCurve: The daily curve.
+        """
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        if trend_model is None:
+            trend_model = PriceTrendModel.fit(ordinals, prices)
+
+        # Lay out one entry per day and evaluate the trend everywhere
+        first_ordinal = ordinals[0] - extrapolation_days
+        all_ordinals = np.arange(first_ordinal, ordinals[-1] + extrapolation_days + 1, dtype=np.int64)
+        daily_prices = trend_model.predict_ordinals(all_ordinals)
+
+        # Overwrite the recorded range with prices interpolated between the month-ends
+        recorded = slice(extrapolation_days, extrapolation_days + ordinals[-1] - ordinals[0] + 1)
+        daily_prices[recorded] = np.interp(all_ordinals[recorded], ordinals, prices)
+
+        return cls(first_ordinal, daily_prices, trend_model)
+
+    @classmethod
+    def from_csv(cls, file_path, extrapolation_days=365):
+        """
+        Builds the daily curve from a Nat_Gas style CSV file and the shared trend model of that file.
+
+        Inputs:
+        - file_path (str): The path to the CSV file.
+        - extrapolation_days (int): Number of days of trend prices stored before the first and after the last record.
+
+        Outputs:
+        - ForwardCurve: The daily curve.
+        """
+        ordinals, prices = read_price_history(file_path)
+        trend_model = load_price_model(file_path)
+        with span('forward_curve.build', path=file_path):
+            return cls.from_history(ordinals, prices, extrapolation_days, trend_model)
+
+    def prices_at_ordinals(self, ordinals):
+        """
+        Looks up the curve price for an array of day ordinals.
+
+        Inputs:
+        - ordinals (numpy.ndarray): int64 day ordinals.
+
+        Outputs:
+        - numpy.ndarray: Price on each day.
+        """
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        index = ordinals - self.first_ordinal
+        count('forward_curve.lookups', index.size)
+        outside = (index < 0) | (index >= len(self.daily_prices))
+        if not outside.any():
+            return self.daily_prices[index]
+
+        # Dates beyond the stored array are priced by the trend the array was extended with
+        prices = self.daily_prices[np.clip(index, 0, len(self.daily_prices) - 1)]
+        prices[outside] = self.trend_model.predict_ordinals(ordinals[outside])
+        return prices
+
+    def prices(self, dates):
+        """
+        Looks up the curve price for an array of dates.
+
+        Inputs:
+        - dates (list, array or Series): Dates as 'YYYY-MM-DD' strings, date/datetime objects or datetime64 values.
+
+        Outputs:
+        - numpy.ndarray: Price on each date.
+        """
+        return self.prices_at_ordinals(dates_to_ordinals(dates))
+
+    def price(self, date):
+        """
+        Looks up the curve price for a single date.
+
+        Inputs:
+        - date (str, date or datetime): The date ('YYYY-MM-DD' if a string).
+
+        Outputs:
+        - float: Price on that date.
+        """
+        return float(self.prices([date])[0])
+
+
+# Build the curve for a price file once and hand the same object to every later caller
+def load_forward_curve(file_path='Nat_Gas.csv'):
+    """
+    Returns the shared forward curve for a price file, building it on first use and again
+    whenever a different trend model has been loaded or published for the file since.
+
+    Inputs:
+    - file_path (str): The path to the CSV file.
+
+    Outputs:
+    - ForwardCurve: The daily curve.
+    """
+    key = os.path.abspath(file_path)
+    curve = _forward_curves.get(key)
+    if curve is None or curve.trend_model is not load_price_model(file_path):
+        _forward_curves[key] = ForwardCurve.from_csv(file_path)
+    return _forward_curves[key]
@@ -0,0 +1,354 @@
+# Natural gas price forecasting library
+# Headless entry point for the linear trend model of Task One: the fitted coefficients and origin date are
+# persisted as a small JSON artifact and reloaded at startup, so importing this module never pulls in
+# matplotlib or sklearn and never refits. Plots and the example prediction run from the command line:
+#
+#     python gas_forecast.py --plot --date 2025-02-25
+
+# Various imports to be used throughout the forecasting library
+import argparse
+import json
+import os
+from collections import deque
+from datetime import datetime
+from fractions import Fraction
+
+import numpy as np
+
+from instrumentation import count, span
+from price_store import dates_to_ordinals, load_price_store, ordinals_to_dates, refresh_price_store, replace_atomically, store_paths
+
+# Loaded models, keyed by the absolute path of the price file they were fitted to
+_price_models = {}
+
+
+class PriceTrendModel:
+    """
+    Linear trend of the natural gas price in the number of days since the first recorded date.
+    """
+
+    def __init__(self, origin_ordinal, intercept, slope, source_sha256=None):
+        """
+        Inputs:
+        - origin_ordinal (int): Day ordinal of the first recorded date.
+        - intercept (float): Predicted price on the origin date.
+        - slope (float): Price change per day.
+        - source_sha256 (str): Hash of the price file the model was fitted to.
+        """
+        self.origin_ordinal = int(origin_ordinal)
+        self.intercept = float(intercept)
+        self.slope = float(slope)
+        self.source_sha256 = source_sha256
+
+    @classmethod
+    def fit(cls, ordinals, prices, source_sha256=None):
+        """
+        Fits the trend with a sklearn LinearRegression on the days since the first recorded date.
+
+        Inputs:
+        - ordinals (numpy.ndarray): Day ordinals of the recorded prices, in ascending order.
+        - prices (numpy.ndarray): Recorded prices.
+        - source_sha256 (str): Hash of the price file the prices come from.
+
+        Outputs:
+        - PriceTrendModel: The fitted model.
+        """
+        # sklearn is only needed when the model has to be refitted
+        from sklearn.linear_model import LinearRegression
+
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        days_since_start = (ordinals - ordinals[0]).reshape(-1, 1)
+        linear_regression_model = LinearRegression()
+        with span('price_model.fit', rows=len(ordinals)):
+            linear_regression_model.fit(days_since_start, np.asarray(prices, dtype=np.float64))
+        return cls(ordinals[0], linear_regression_model.intercept_, linear_regression_model.coef_[0], source_sha256)
+
+    @classmethod
+    def load(cls, model_path):
+        """
+        Reads a model artifact written by save.
+        """
+        with open(model_path) as file:
+            artifact = json.load(file)
+        origin_ordinal = datetime.strptime(artifact['origin_date'], '%Y-%m-%d').toordinal()
+        return cls(origin_ordinal, artifact['intercept'], artifact['slope'], artifact.get('source_sha256'))
+
+    def save(self, model_path):
+        """
+        Writes the coefficients and origin date as a small JSON artifact.
+        """
+        artifact = {
+            'origin_date': datetime.fromordinal(self.origin_ordinal).strftime('%Y-%m-%d'),
+            'intercept': self.intercept,
+            'slope': self.slope,
+            'source_sha256': self.source_sha256,
+        }
+        replace_atomically(model_path, lambda file: file.write(json.dumps(artifact).encode()))
+
+    def predict_ordinals(self, ordinals):
+        """
+        Predicts the price on each of an array of day ordinals.
+        """
+        return self.intercept + self.slope * (np.asarray(ordinals, dtype=np.int64) - self.origin_ordinal)
+
+    def prices_at_ordinals(self, ordinals):
+        """
+        Same as predict_ordinals, so the model can stand in for a ForwardCurve in the batch contract pricers.
+        """
+        return self.predict_ordinals(ordinals)
+
+    def predict(self, dates):
+        """
+        Predicts the price on each of an array of dates ('YYYY-MM-DD' strings, date/datetime objects or datetime64 values).
+        """
+        with span('price_model.predict'):
+            ordinals = dates_to_ordinals(dates)
+            count('price_model.predicted_dates', len(ordinals))
+            return self.predict_ordinals(ordinals)
+
+
+# Path of the model artifact stored for a price file
+def model_artifact_path(file_path):
+    return store_paths(file_path)[0][:-len('.json')] + '.model.json'
+
+
+# Load the persisted model for a price file, fitting and saving it only when the file has changed
+def load_price_model(file_path='Nat_Gas.csv', refit=False):
+    """
+    Returns the trend model for a price file.
+
+    The model is kept in memory after the first call. On startup it is read from its
+    artifact next to the binary price store, and refitted only if the artifact is missing,
+    was fitted to a different version of the file, or refit is requested.
+
+    Parameters:
+    - file_path (str): Path to the Nat_Gas CSV file.
+    - refit (bool): Refit and save the model even if a current artifact exists.
+
+    Returns:
+    - PriceTrendModel: The fitted model.
+    """
+    key = os.path.abspath(file_path)
+    if key in _price_models and not refit:
+        return _price_models[key]
+
+    source_sha256 = refresh_price_store(file_path)['sha256']
+    model_path = model_artifact_path(file_path)
+    model = None
+    if not refit and os.path.exists(model_path):
+        model = PriceTrendModel.load(model_path)
+        if model.source_sha256 != source_sha256:
+            model = None
+
+    if model is None:
+        model = PriceTrendModel.fit(*load_price_store(file_path), source_sha256=source_sha256)
+        model.save(model_path)
+
+    _price_models[key] = model
+    return model
+
+
+class OnlineTrendEstimator:
+    """
+    Incrementally updated least-squares trend for prices arriving through the day.
+
+    Keeps the count, sums and cross-products of (days since origin, price) so adding or
+    removing an observation is O(1). The sums are held as exact integers and rationals,
+    so the coefficients after any sequence of additions and removals equal a full refit
+    on the observations in the window, with no rounding drift.
+    """
+
+    def __init__(self, origin_ordinal, window_size=None, file_path=None):
+        """
+        Inputs:
+        - origin_ordinal (int): Day ordinal the trend is measured from.
+        - window_size (int): Keep only the most recent window_size observations, all of them if None.
+        - file_path (str): Price file whose shared model publish replaces by default.
+        """
+        self.origin_ordinal = int(origin_ordinal)
+        self.window_size = window_size
+        self.file_path = file_path
+        self.observations = deque()
+        self.count = 0
+        self.sum_x = 0
+        self.sum_xx = 0
+        self.sum_y = Fraction(0)
+        self.sum_xy = Fraction(0)
+
+    @classmethod
+    def from_price_file(cls, file_path='Nat_Gas.csv', window_size=None):
+        """
+        Seeds the estimator with the history of a price file, measured from its first recorded date.
+        """
+        ordinals, prices = load_price_store(file_path)
+        estimator = cls(ordinals[0], window_size, file_path)
+        for ordinal, price in zip(ordinals.tolist(), prices.tolist()):
+            estimator.add_ordinal(ordinal, price)
+        return estimator
+
+    def add_ordinal(self, ordinal, price):
+        """
+        Adds one observation given as a day ordinal and price, dropping the oldest one if the window is full.
+        """
+        x = int(ordinal) - self.origin_ordinal
+        y = Fraction(float(price))
+        self.observations.append((x, y))
+        self.count += 1
+        self.sum_x += x
+        self.sum_xx += x * x
+        self.sum_y += y
+        self.sum_xy += x * y
+        if self.window_size is not None and self.count > self.window_size:
+            self._remove_oldest()
+
+    def add(self, date, price):
+        """
+        Adds one observation ('YYYY-MM-DD' string, date/datetime object or datetime64 date and its price).
+        """
+        self.add_ordinal(dates_to_ordinals([date])[0], price)
+
+    def remove_before(self, date):
+        """
+        Removes every observation older than date, for windows measured in time rather than in count.
+        """
+        cutoff = int(dates_to_ordinals([date])[0]) - self.origin_ordinal
+        while self.observations and self.observations[0][0] < cutoff:
+            self._remove_oldest()
+
+    def _remove_oldest(self):
+        x, y = self.observations.popleft()
+        self.count -= 1
+        self.sum_x -= x
+        self.sum_xx -= x * x
+        self.sum_y -= y
+        self.sum_xy -= x * y
+
+    def coefficients(self):
+        """
+        Returns the (intercept, slope) of the least-squares trend on the observations in the window.
+        """
+        denominator = self.count * self.sum_xx - self.sum_x ** 2
+        if denominator == 0:
+            raise ValueError("At least two observations on different dates are needed to fit the trend")
+        slope = (self.count * self.sum_xy - self.sum_x * self.sum_y) / denominator
+        intercept = (self.sum_y - slope * self.sum_x) / self.count
+        return float(intercept), float(slope)
+
+    def model(self):
+        """
+        Returns the current trend as a PriceTrendModel.
+        """
+        return PriceTrendModel(self.origin_ordinal, *self.coefficients())
+
+    def publish(self, file_path=None):
+        """
+        Replaces the shared model of a price file with the current trend, so forecasts and the contract
+        pricer use the new coefficients on their next call without reloading the CSV.
+
+        Parameters:
+        - file_path (str): Price file whose model is replaced, defaults to the file the estimator was seeded from.
+
+        Returns:
+        - PriceTrendModel: The published model.
+        """
+        file_path = file_path or self.file_path or 'Nat_Gas.csv'
+        model = self.model()
+        _price_models[os.path.abspath(file_path)] = model
+        return model
+
+
+# Predict prices for many dates at once
+def price_predictions_from_dates(dates, file_path='Nat_Gas.csv'):
+    """
+    Predicts the price of natural gas for an array of dates in one vectorized pass.
+
+    Parameters:
+    - dates (list, array or Series): The dates for which to predict prices (format: 'YYYY-MM-DD')
+    - file_path (str): Path to the Nat_Gas CSV file the model is fitted to.
+
+    Returns:
+    - numpy.ndarray: Predicted price for each date, in the same order.
+    """
+    return load_price_model(file_path).predict(dates)
+
+
+# Predict price for a given date
+def price_prediction_from_date(date, file_path='Nat_Gas.csv'):
+    """
+    Predicts the price of natural gas on a specific date using linear regression.
+
+    Parameters:
+    - date (str): The date for which to predict the price (format: 'YYYY-MM-DD')
+    - file_path (str): Path to the Nat_Gas CSV file the model is fitted to.
+
+    Returns:
+    - float: Predicted price for that date.
+    """
+    return float(price_predictions_from_dates([date], file_path)[0])
+
+
+# Plot the historical prices and the trend extrapolated over the following months
+def plot_price_forecast(file_path='Nat_Gas.csv', months=12):
+    """
+    Shows the historical natural gas prices, then the history with the next months of predicted prices.
+
+    Parameters:
+    - file_path (str): Path to the Nat_Gas CSV file.
+    - months (int): Number of months to extrapolate.
+    """
+    # Plotting libraries are only imported on this explicit path
+    import matplotlib.dates as mdates
+    import matplotlib.pyplot as plt
+
+    ordinals, prices = load_price_store(file_path)
+    dates = ordinals_to_dates(ordinals)
+    model = load_price_model(file_path)
+
+    # Help to visualize the historical natural gas prices and dates over time
+    plt.figure(figsize=(10, 6), num="Natural Gas Prices Over Time")
+    plt.plot(dates, prices, label="Natural Gas Prices Over Time")
+    plt.title("Natural Gas Prices Over Time (Monthly)")
+    plt.xlabel("Dates")
+    plt.ylabel("Price (USD per unit)")
+    plt.xticks(rotation=45)
+    plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%m/%d/%Y'))
+    plt.tight_layout()
+    plt.grid(True)
+    plt.legend()
+    plt.show()
+
+    # Predict the month-ends following the last recorded date
+    last_month = dates[-1].astype('datetime64[M]')
+    future_dates = (last_month + np.arange(2, months + 2)).astype('datetime64[D]') - 1
+    predicted_prices = model.predict(future_dates)
+
+    plt.figure(figsize=(10, 6), num=f"Natural Gas Price Forecast (For Next {months} Months)")
+    plt.plot(dates, prices, label="Historical Natural Gas Prices")
+    plt.plot(future_dates, predicted_prices, label=f"Predicted Prices (For Next {months} months)", linestyle=":")
+    plt.title(f"Natural Gas Price Forecast (For Next {months} Months)")
+    plt.xlabel("Date")
+    plt.ylabel("Price (USD per unit)")
+    plt.xticks(rotation=45)
+    plt.grid(True)
+    plt.legend()
+    plt.show()
+
+
+# Command line entry point for refitting, plotting and example predictions
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Natural gas price forecast from the linear trend model.")
+    parser.add_argument('--file', default='Nat_Gas.csv', help="price CSV file (default: Nat_Gas.csv)")
+    parser.add_argument('--refit', action='store_true', help="refit and save the model even if it is current")
+    parser.add_argument('--plot', action='store_true', help="show the history and forecast plots")
+    parser.add_argument('--date', action='append', default=[], help="date to predict (YYYY-MM-DD), may be repeated")
+    args = parser.parse_args(argv)
+
+    load_price_model(args.file, refit=args.refit)
+    if args.plot:
+        plot_price_forecast(args.file)
+    for date in args.date:
+        print(price_prediction_from_date(date, args.file))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+# Opt-in instrumentation of the hot paths
+# Named timing spans and counters around CSV parsing, model fitting, prediction and the contract loops.
+# Disabled by default: span() then returns a shared no-op context manager and count() returns at once,
+# so instrumented code pays one flag check. Enable it with INSTRUMENTATION=1 in the environment or with
+# enable(), then read summary() or write the JSON trace with dump_trace(). The command line wraps any
+# entry point script in the tracer, or in cProfile and tracemalloc:
+#
+#     python instrumentation.py --trace trace.json task-2.py
+#     python instrumentation.py --profile task-3.py
+
+# Some imports to be used throughout the instrumentation
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import runpy
+import sys
+import threading
+import time
+import tracemalloc
+
+# Environment variable that enables the instrumentation at import
+ENVIRONMENT_VARIABLE = 'INSTRUMENTATION'
+
+# Most span events kept for the trace; later spans still count in the per-name statistics
+MAX_TRACE_EVENTS = 100000
+
+_enabled = os.environ.get(ENVIRONMENT_VARIABLE, '') not in ('', '0')
+_lock = threading.Lock()
+_events = []
+_dropped_events = 0
+_span_stats = {}
+_counters = {}
+
+
+class _Span:
+    """
+    Times the block it wraps and records it as one trace event.
+    """
+
+    __slots__ = ('name', 'attributes', 'started')
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        global _dropped_events
+        seconds = time.perf_counter() - self.started
+        with _lock:
+            stats = _span_stats.get(self.name)
+            if stats is None:
+                stats = _span_stats[self.name] = {'calls': 0, 'total_seconds': 0.0, 'max_seconds': 0.0}
+            stats['calls'] += 1
+            stats['total_seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+
+            if len(_events) >= MAX_TRACE_EVENTS:
+                _dropped_events += 1
+                return False
+            event = {'name': self.name, 'start': self.started, 'seconds': seconds,
+                     'thread': threading.get_ident(), 'pid': os.getpid()}
+            if self.attributes:
+                event['attributes'] = self.attributes
+            _events.append(event)
+        return False
+
+
+class _NullSpan:
+    """
+    Context manager that does nothing, returned by span while the instrumentation is disabled.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """
+    Forget every recorded span and counter.
+    """
+    global _dropped_events
+    with _lock:
+        _events.clear()
+        _dropped_events = 0
+        _span_stats.clear()
+        _counters.clear()
+
+
+# Time a block of code under a name
+def span(name, **attributes):
+    """
+    Context manager timing the block it wraps, e.g. `with span('price_store.parse_csv', rows=n):`.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, attributes)
+
+
+# Add to a named counter
+def count(name, value=1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+# Aggregate the recorded spans and counters
+def summary():
+    """
+    Return {'spans': {name: calls, total/mean/max seconds}, 'counters': {name: value}},
+    spans ordered by total time. Every span counts, including those beyond MAX_TRACE_EVENTS.
+    """
+    with _lock:
+        spans = {name: dict(stats) for name, stats in _span_stats.items()}
+        counters = dict(_counters)
+
+    for stats in spans.values():
+        stats['mean_seconds'] = stats['total_seconds'] / stats['calls']
+    spans = dict(sorted(spans.items(), key=lambda item: item[1]['total_seconds'], reverse=True))
+    return {'spans': spans, 'counters': counters}
+
+
+# Write the recorded spans as JSON
+def dump_trace(path):
+    """
+    Write the summary and the recorded span events to a JSON file. The 'traceEvents' list uses
+    the Chrome trace event format, so the file also opens in chrome://tracing or Perfetto;
+    'dropped_events' is the number of spans past MAX_TRACE_EVENTS left out of it.
+    """
+    with _lock:
+        events = list(_events)
+        dropped_events = _dropped_events
+    trace = summary()
+    trace['dropped_events'] = dropped_events
+    trace['traceEvents'] = [{'name': event['name'], 'ph': 'X', 'ts': event['start'] * 1e6, 'dur': event['seconds'] * 1e6,
+                             'pid': event['pid'], 'tid': event['thread'], 'args': event.get('attributes', {})}
+                            for event in events]
+    with open(path, mode='w') as file:
+        json.dump(trace, file, indent=2)
+
+
+# Run a function under cProfile and tracemalloc
+def profile_call(function, *args, top=20, memory=True, output=None, **kwargs):
+    """
+    Call function(*args, **kwargs) under cProfile (and tracemalloc when memory is True),
+    write the top functions by cumulative time and the top allocating lines to output
+    (standard error by default), and return the function's result.
+    """
+    output = output or sys.stderr
+    profiler = cProfile.Profile()
+    if memory:
+        tracemalloc.start()
+    try:
+        profiler.enable()
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            profiler.disable()
+        snapshot = tracemalloc.take_snapshot() if memory else None
+        peak_memory = tracemalloc.get_traced_memory()[1] if memory else None
+    finally:
+        if memory:
+            tracemalloc.stop()
+
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(top)
+    output.write(f"Hot functions (top {top} by cumulative time):\n{stream.getvalue()}")
+
+    if snapshot is not None:
+        output.write(f"Top allocators (peak traced memory {peak_memory / 2 ** 20:.1f} MiB):\n")
+        for statistic in snapshot.statistics('lineno')[:top]:
+            output.write(f"  {statistic}\n")
+    return result
+
+
+# Command line entry point: run a script with the tracer or the profilers
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a script with instrumentation or profiling.")
+    parser.add_argument('--trace', help="enable the spans and counters and write the JSON trace to this file")
+    parser.add_argument('--profile', action='store_true', help="run the script under cProfile and tracemalloc")
+    parser.add_argument('--top', type=int, default=20, help="number of functions and allocators reported (default: 20)")
+    parser.add_argument('script', help="script to run, e.g. task-2.py")
+    parser.add_argument('arguments', nargs=argparse.REMAINDER, help="arguments of the script")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        enable()
+    sys.argv = [args.script] + args.arguments
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    try:
+        if args.profile:
+            profile_call(runpy.run_path, args.script, run_name='__main__', top=args.top)
+        else:
+            runpy.run_path(args.script, run_name='__main__')
+    finally:
+        if args.trace:
+            dump_trace(args.trace)
+            print(json.dumps(summary(), indent=2), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    # Scripts import this file as `instrumentation`, which must be the module already running
+    sys.modules['instrumentation'] = sys.modules['__main__']
+    main()
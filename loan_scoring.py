@@ -0,0 +1,135 @@
+# Batch expected-loss scoring for whole loan books
+# Streams a loan CSV or Parquet file in fixed-size chunks and scores each chunk in one vectorized
+# scaler.transform / predict_proba call, using the model and scaler fitted in task-3.py
+
+# Some imports to be used throughout the batch scorer
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from compiled_scorer import LOAN_FEATURES
+from instrumentation import count, span
+from price_store import replace_atomically
+
+
+# Persist the fitted model and scaler so scoring processes do not retrain
+def save_scoring_model(model, scaler, path):
+    """
+    Save a fitted model and scaler together as one pickle file, with the features the
+    scaler was fitted on, so a model trained on other features (such as the FICO rating
+    of preprocess_data with a rating_map) is never loaded as a raw-score model.
+    """
+    if not hasattr(scaler, 'feature_names_in_'):
+        raise ValueError("The scaler was fitted without feature names; fit it on a DataFrame of the model features")
+    features = [str(feature) for feature in scaler.feature_names_in_]
+    replace_atomically(path, lambda file: pickle.dump({'model': model, 'scaler': scaler, 'features': features}, file))
+
+
+# Load a model and scaler saved with save_scoring_model
+def load_scoring_model(path):
+    """
+    Return the (model, scaler) pair saved in a pickle file.
+    """
+    with open(path, mode='rb') as file:
+        artifact = pickle.load(file)
+    if artifact.get('features') != LOAN_FEATURES:
+        raise ValueError(f"Model in {path} was trained on features {artifact.get('features')}, expected {LOAN_FEATURES}")
+    return artifact['model'], artifact['scaler']
+
+
+# Score one chunk of loans
+def score_loans(model, scaler, loans, recovery_rate=0.10):
+    """
+    Calculate the probability of default and expected loss of every loan in a DataFrame.
+    Loans with a missing feature get NaN for both.
+    """
+    loans = pd.DataFrame(loans)
+    features = loans[LOAN_FEATURES]
+    complete = features.notna().all(axis=1).to_numpy()
+
+    # Predict the probability of default (PD) for all complete rows at once
+    probability_of_default = np.full(len(loans), np.nan)
+    if complete.any():
+        with span('score_loans.predict', rows=int(complete.sum())):
+            probability_of_default[complete] = model.predict_proba(scaler.transform(features[complete]))[:, 1]
+    count('score_loans.loans', len(loans))
+
+    # Expected Loss = PD × Loan Amount × (1 − Recovery Rate)
+    loan_amt = loans['loan_amt_outstanding'].to_numpy(dtype=np.float64)
+    expected_loss = probability_of_default * loan_amt * (1 - recovery_rate)
+    return probability_of_default, expected_loss
+
+
+# Read a CSV or Parquet loan file chunk by chunk
+def read_loan_chunks(input_path, chunk_size=100000):
+    """
+    Yield DataFrames of at most chunk_size loans from a CSV or Parquet file.
+    """
+    if input_path.endswith('.parquet'):
+        # pyarrow is only needed for Parquet books
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(input_path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(input_path, chunksize=chunk_size)
+
+
+# Score a whole loan book file
+def score_loan_file(model, scaler, input_path, output_path=None, chunk_size=100000, recovery_rate=0.10, id_column='customer_id'):
+    """
+    Score every loan in a CSV or Parquet file and return portfolio totals.
+
+    Chunks are read, scored and appended to output_path one at a time, so memory is
+    bounded by chunk_size rather than by the size of the book. The output holds the
+    id column (when present), probability_of_default and expected_loss of every loan,
+    as CSV or Parquet depending on the output file extension.
+    """
+    parquet_writer = None
+    wrote_csv_header = False
+    totals = {'loans': 0, 'scored_loans': 0, 'total_exposure': 0.0, 'expected_loss': 0.0, 'sum_probability_of_default': 0.0}
+
+    if output_path is not None and os.path.exists(output_path):
+        os.remove(output_path)
+
+    try:
+        for chunk in read_loan_chunks(input_path, chunk_size):
+            probability_of_default, expected_loss = score_loans(model, scaler, chunk, recovery_rate)
+            scored = ~np.isnan(probability_of_default)
+
+            totals['loans'] += len(chunk)
+            totals['scored_loans'] += int(scored.sum())
+            totals['total_exposure'] += float(chunk['loan_amt_outstanding'].to_numpy(dtype=np.float64)[scored].sum())
+            totals['expected_loss'] += float(expected_loss[scored].sum())
+            totals['sum_probability_of_default'] += float(probability_of_default[scored].sum())
+
+            if output_path is None:
+                continue
+
+            # Write this chunk's results before reading the next one
+            results = pd.DataFrame({'probability_of_default': probability_of_default, 'expected_loss': expected_loss})
+            if id_column in chunk.columns:
+                results.insert(0, id_column, chunk[id_column].to_numpy())
+
+            if output_path.endswith('.parquet'):
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(results, preserve_index=False)
+                if parquet_writer is None:
+                    parquet_writer = pq.ParquetWriter(output_path, table.schema)
+                parquet_writer.write_table(table)
+            else:
+                results.to_csv(output_path, mode='a', header=not wrote_csv_header, index=False)
+                wrote_csv_header = True
+    finally:
+        if parquet_writer is not None:
+            parquet_writer.close()
+
+    # Portfolio-level summary
+    sum_probability_of_default = totals.pop('sum_probability_of_default')
+    totals['mean_probability_of_default'] = sum_probability_of_default / totals['scored_loans'] if totals['scored_loans'] else float('nan')
+    return totals
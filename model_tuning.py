@@ -0,0 +1,205 @@
+# Cross-validated tuning of the probability of default (PD) model
+# Searches the regularization strength C, solver and class weights of the task-3.py LogisticRegression
+# with stratified k-fold cross-validation. Fold splits and their scaled matrices are prepared once and
+# cached; every (fold, solver, class weight) task walks the C path from strong to weak regularization,
+# warm-starting each fit from the previous coefficients, and tasks run across a process pool.
+
+# Some imports to be used throughout the tuner
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, log_loss, roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+
+from compiled_scorer import LOAN_FEATURES
+from price_store import file_hash, replace_atomically
+
+TARGET = 'default'
+
+# Directory next to a loan file where its prepared folds are cached
+FOLD_CACHE_DIRECTORY = '.fold_cache'
+
+# Names of the arrays saved for every fold
+FOLD_ARRAYS = ('x_train', 'y_train', 'x_valid', 'y_valid')
+
+# Leaderboard metrics, and whether a higher value is better
+SCORING = {'log_loss': False, 'accuracy': True, 'roc_auc': True}
+
+# Folds already prepared in this process, by (file path, number of folds, seed), with the
+# modification time and size of the file they were prepared from
+_cv_folds = {}
+
+# Folds used by the tuning tasks of this process, set by _share_folds
+_shared_folds = None
+
+
+# Split the loans into stratified folds and scale each training part, as preprocess_data does
+def prepare_cv_folds(df, n_splits=5, random_state=42):
+    """
+    Return one dict per fold with the scaled training and validation features and targets.
+    The scaler of every fold is fitted on its training rows only.
+    """
+    df = df.dropna(subset=LOAN_FEATURES + [TARGET])
+    x = df[LOAN_FEATURES].to_numpy(dtype=np.float64)
+    y = df[TARGET].to_numpy()
+
+    folds = []
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    for train_index, valid_index in splitter.split(x, y):
+        scaler = StandardScaler().fit(x[train_index])
+        folds.append({
+            'x_train': scaler.transform(x[train_index]),
+            'y_train': y[train_index],
+            'x_valid': scaler.transform(x[valid_index]),
+            'y_valid': y[valid_index],
+        })
+    return folds
+
+
+# Path of the fold cache stored for a loan file
+def fold_cache_path(file_path, n_splits, random_state):
+    directory = os.path.join(os.path.dirname(os.path.abspath(file_path)), FOLD_CACHE_DIRECTORY)
+    return os.path.join(directory, os.path.basename(file_path) + f'.folds-{n_splits}-{random_state}.npz')
+
+
+# Write the folds tagged with their source file, moving the file into place once complete
+def save_cv_folds(cache_path, folds, source_sha256, fingerprint):
+    arrays = {f'{i}_{name}': fold[name] for i, fold in enumerate(folds) for name in FOLD_ARRAYS}
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    replace_atomically(cache_path, lambda file: np.savez(file, source_sha256=source_sha256, mtime_ns=fingerprint[0],
+                                                         size=fingerprint[1], **arrays))
+
+
+# Load the folds of a loan file, preparing and saving them only when the file has changed
+def load_cv_folds(file_path, n_splits=5, random_state=42):
+    """
+    Returns the cross-validation folds of a loan CSV file.
+
+    Folds are kept in memory after the first call and saved in a .fold_cache directory
+    next to the file, tagged with its modification time, size and SHA-256, so later runs
+    skip the split and scaling. As for the price store, the file is only hashed when its
+    modification time or size no longer match; a touched but unchanged file keeps its folds.
+    """
+    key = (os.path.abspath(file_path), n_splits, random_state)
+    stat = os.stat(file_path)
+    fingerprint = (stat.st_mtime_ns, stat.st_size)
+    cached = _cv_folds.get(key)
+    if cached is not None and cached['fingerprint'] == fingerprint:
+        return cached['folds']
+
+    cache_path = fold_cache_path(file_path, n_splits, random_state)
+    folds = source_sha256 = None
+    if os.path.exists(cache_path):
+        with np.load(cache_path, allow_pickle=False) as artifact:
+            stored_sha256 = str(artifact['source_sha256'])
+            if (int(artifact['mtime_ns']), int(artifact['size'])) != fingerprint:
+                source_sha256 = file_hash(file_path)
+            if source_sha256 in (None, stored_sha256):
+                folds = [{name: artifact[f'{i}_{name}'] for name in FOLD_ARRAYS} for i in range(n_splits)]
+
+    if folds is None:
+        folds = prepare_cv_folds(pd.read_csv(file_path), n_splits, random_state)
+        save_cv_folds(cache_path, folds, source_sha256 or file_hash(file_path), fingerprint)
+    elif source_sha256 is not None:
+        # Touched but unchanged: record the new modification time so the next run skips the hash
+        save_cv_folds(cache_path, folds, source_sha256, fingerprint)
+
+    _cv_folds[key] = {'fingerprint': fingerprint, 'folds': folds}
+    return folds
+
+
+# Pool initializer: keep one copy of the folds per worker process
+def _share_folds(folds):
+    global _shared_folds
+    _shared_folds = folds
+
+
+# Worker task: fit one fold along the whole C path, warm-starting each fit from the previous one
+def _fit_path(fold_index, solver, class_weight, Cs, max_iter):
+    fold = _shared_folds[fold_index]
+    # liblinear ignores warm_start and refits every C from scratch
+    model = LogisticRegression(solver=solver, class_weight=class_weight, max_iter=max_iter, warm_start=True)
+    results = []
+    for C in Cs:
+        model.set_params(C=C)
+        started = time.perf_counter()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', ConvergenceWarning)
+            model.fit(fold['x_train'], fold['y_train'])
+        fit_seconds = time.perf_counter() - started
+
+        probability_of_default = model.predict_proba(fold['x_valid'])[:, 1]
+        results.append({
+            'solver': solver,
+            'class_weight': class_weight or 'none',
+            'C': C,
+            'fold': fold_index,
+            'log_loss': log_loss(fold['y_valid'], probability_of_default, labels=[0, 1]),
+            'accuracy': accuracy_score(fold['y_valid'], probability_of_default >= 0.5),
+            'roc_auc': roc_auc_score(fold['y_valid'], probability_of_default),
+            'iterations': int(np.max(model.n_iter_)),
+            'fit_seconds': fit_seconds,
+        })
+    return results
+
+
+# Function to tune the PD model with cross-validation
+def tune_logistic_regression(folds, Cs=np.logspace(-3, 2, 11), solvers=('lbfgs', 'liblinear', 'saga'),
+                             class_weights=(None, 'balanced'), scoring='log_loss', max_iter=1000, max_workers=None):
+    """
+    Cross-validate every (solver, class weight, C) configuration of the PD model.
+
+    Parameters:
+    - folds (list): Folds from prepare_cv_folds or load_cv_folds.
+    - Cs (array): Inverse regularization strengths, fitted from the smallest (strongest
+      regularization) to the largest so every fit starts from its neighbour's solution.
+    - solvers (tuple): LogisticRegression solvers to try.
+    - class_weights (tuple): Class weights to try, None or 'balanced'.
+    - scoring (str): 'log_loss', 'accuracy' or 'roc_auc' used to rank the configurations.
+    - max_iter (int): Iteration limit of every fit.
+    - max_workers (int): Number of worker processes, 1 runs everything in the current process.
+
+    Returns:
+    - pandas.DataFrame: Leaderboard, best configuration first, with the mean and standard
+      deviation of every metric across folds, the iterations and fit time per fit, and the
+      total fit time of the configuration.
+    """
+    if scoring not in SCORING:
+        raise ValueError(f"Unknown scoring {scoring!r}, expected one of {list(SCORING)}")
+    Cs = sorted(float(C) for C in Cs)
+    tasks = [(fold_index, solver, class_weight, Cs, max_iter)
+             for solver in solvers for class_weight in class_weights for fold_index in range(len(folds))]
+
+    if max_workers == 1:
+        _share_folds(folds)
+        results = [_fit_path(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_share_folds, initargs=(folds,)) as executor:
+            results = [future.result() for future in [executor.submit(_fit_path, *task) for task in tasks]]
+
+    # One row per configuration, averaged over the folds
+    scores = pd.DataFrame([row for path in results for row in path])
+    leaderboard = scores.groupby(['solver', 'class_weight', 'C']).agg(
+        log_loss=('log_loss', 'mean'), log_loss_std=('log_loss', 'std'),
+        accuracy=('accuracy', 'mean'), accuracy_std=('accuracy', 'std'),
+        roc_auc=('roc_auc', 'mean'), roc_auc_std=('roc_auc', 'std'),
+        mean_iterations=('iterations', 'mean'),
+        mean_fit_seconds=('fit_seconds', 'mean'), total_fit_seconds=('fit_seconds', 'sum'),
+    ).reset_index()
+    leaderboard = leaderboard.sort_values(scoring, ascending=not SCORING[scoring], kind='stable').reset_index(drop=True)
+    leaderboard.insert(0, 'rank', np.arange(1, len(leaderboard) + 1))
+    return leaderboard
+
+
+# Parameters of the best leaderboard row, ready for train_model in task-3.py
+def best_model_parameters(leaderboard):
+    best = leaderboard.iloc[0]
+    return {'C': float(best['C']), 'solver': best['solver'],
+            'class_weight': None if best['class_weight'] == 'none' else best['class_weight'], 'max_iter': 1000}
@@ -0,0 +1,230 @@
+# Rolling-origin backtest of natural gas price forecast models
+# Refits every candidate model at each forecast origin on the prices recorded before it, forecasts the
+# next recorded prices and reports the error by horizon with fit/predict timings. Models are the linear
+# trend of task-1.py, a trend with yearly sine/cosine seasonality and a restricted cubic spline trend.
+# The least-squares models are updated incrementally from one origin to the next, origins are spread
+# across a process pool, and fitted models are cached by (model, origin):
+#
+#     python price_backtest.py --file Nat_Gas.csv --horizons 12
+
+# Various imports to be used throughout the backtest
+import argparse
+import hashlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from price_store import load_price_store, ordinals_to_dates
+
+# Length of a year in days, the time unit of the model features
+DAYS_PER_YEAR = 365.25
+
+# Number of knots of the spline model, placed at quantiles of the training dates
+SPLINE_KNOTS = 4
+
+# Fitted coefficients and knots, keyed by (model name, origin ordinal, key of the prices before the origin);
+# a fit only depends on those prices, so it is reused whatever the horizons or the prices recorded later
+_fitted_models = {}
+
+
+# Feature functions of the candidate models, on years since the first recorded date
+def linear_features(t, knots=None):
+    return np.column_stack([np.ones_like(t), t])
+
+
+def seasonal_features(t, knots=None):
+    return np.column_stack([np.ones_like(t), t, np.sin(2 * np.pi * t), np.cos(2 * np.pi * t)])
+
+
+def spline_features(t, knots):
+    """
+    Restricted cubic spline basis: cubic between the knots and linear beyond the outer ones,
+    so forecasts extrapolate the end slope instead of a cubic.
+    """
+    columns = [np.ones_like(t), t]
+    last, second_last = knots[-1], knots[-2]
+    for knot in knots[:-2]:
+        columns.append(np.maximum(t - knot, 0.0) ** 3
+                       - np.maximum(t - second_last, 0.0) ** 3 * (last - knot) / (last - second_last)
+                       + np.maximum(t - last, 0.0) ** 3 * (second_last - knot) / (last - second_last))
+    # Scale by the knot span so the columns are of the same order as t
+    return np.column_stack(columns) / np.r_[1.0, 1.0, np.full(len(knots) - 2, (last - knots[0]) ** 2)]
+
+
+# Candidate models: feature function, and whether the features of a row do not depend on the origin,
+# which lets the normal equations be updated row by row from one origin to the next
+BACKTEST_MODELS = {
+    'linear': {'features': linear_features, 'incremental': True},
+    'seasonal': {'features': seasonal_features, 'incremental': True},
+    'spline': {'features': spline_features, 'incremental': False},
+}
+
+
+# Identify the prices recorded before every origin, so cached fits are never reused for different data
+def prefix_keys(ordinals, prices, origins):
+    """
+    Returns the SHA-256 of the (ordinal, price) records before each of the sorted origins,
+    hashing every record once.
+    """
+    records = np.column_stack([np.asarray(ordinals, dtype=np.int64).view(np.float64), np.asarray(prices, dtype=np.float64)])
+    digest = hashlib.sha256()
+    keys = {}
+    hashed_rows = 0
+    for origin in origins:
+        digest.update(records[hashed_rows:origin].tobytes())
+        hashed_rows = origin
+        keys[origin] = digest.copy().hexdigest()
+    return keys
+
+
+# Worker task: fit one model at a sorted block of origins
+def _backtest_block(model_name, t, prices, origins):
+    features = BACKTEST_MODELS[model_name]['features']
+    incremental = BACKTEST_MODELS[model_name]['incremental']
+    results = []
+    gram = moments = None
+    fitted_rows = 0
+    for origin in origins:
+        started = time.perf_counter()
+        knots = None
+        if incremental:
+            # Add the rows recorded since the previous origin to the normal equations
+            x = features(t[fitted_rows:origin])
+            if gram is None:
+                gram, moments = x.T @ x, x.T @ prices[fitted_rows:origin]
+            else:
+                gram += x.T @ x
+                moments += x.T @ prices[fitted_rows:origin]
+            fitted_rows = origin
+            coefficients = np.linalg.lstsq(gram, moments, rcond=None)[0]
+        else:
+            knots = np.quantile(t[:origin], np.linspace(0.05, 0.95, SPLINE_KNOTS))
+            coefficients = np.linalg.lstsq(features(t[:origin], knots), prices[:origin], rcond=None)[0]
+        fit_seconds = time.perf_counter() - started
+        results.append({'origin': origin, 'coefficients': coefficients, 'knots': knots, 'fit_seconds': fit_seconds})
+    return model_name, results
+
+
+# Function to backtest the candidate models on a price history
+def backtest_price_history(ordinals, prices, models=tuple(BACKTEST_MODELS), min_train=24, horizons=12, step=1,
+                           block_size=16, max_workers=None):
+    """
+    Rolling-origin backtest: at every origin, each model is fitted to the prices recorded
+    before it and forecasts the next `horizons` recorded prices.
+
+    Parameters:
+    - ordinals (numpy.ndarray): Day ordinals of the recorded prices, in ascending order.
+    - prices (numpy.ndarray): Recorded prices.
+    - models (tuple): Names of BACKTEST_MODELS to compare.
+    - min_train (int): Number of prices before the first origin.
+    - horizons (int): Number of prices forecast from every origin; horizon h is the h-th
+      recorded price after the origin (a month ahead on the monthly Nat_Gas.csv).
+    - step (int): Number of prices between consecutive origins.
+    - block_size (int): Number of consecutive origins fitted by one task.
+    - max_workers (int): Number of worker processes, 1 runs everything in the current process.
+
+    Returns:
+    - dict: 'errors', one row per (model, origin, horizon) with the forecast, actual and
+      error; 'by_horizon', MAE, RMSE and bias per model and horizon; 'timing', the number
+      of fits, cache hits and forecasts and the total and mean fit and predict seconds per model.
+    """
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.float64)
+    unknown = [name for name in models if name not in BACKTEST_MODELS]
+    if unknown:
+        raise ValueError(f"Unknown models {unknown}, expected names from {list(BACKTEST_MODELS)}")
+    origins = list(range(min_train, len(prices), step))
+    if not origins:
+        raise ValueError(f"Need more than min_train={min_train} prices, got {len(prices)}")
+
+    keys = prefix_keys(ordinals, prices, origins)
+    t = (ordinals - ordinals[0]) / DAYS_PER_YEAR
+
+    # Only fit the (model, origin) pairs that are not cached yet
+    timing = {name: {'model': name, 'fits': 0, 'cache_hits': 0, 'fit_seconds': 0.0, 'forecasts': 0, 'predict_seconds': 0.0}
+              for name in models}
+    tasks = []
+    for name in models:
+        missing = [origin for origin in origins if (name, int(ordinals[origin]), keys[origin]) not in _fitted_models]
+        timing[name]['cache_hits'] = len(origins) - len(missing)
+        tasks += [(name, missing[i:i + block_size]) for i in range(0, len(missing), block_size)]
+
+    if max_workers == 1 or len(tasks) <= 1:
+        results = [_backtest_block(name, t, prices, block) for name, block in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_backtest_block, name, t, prices, block) for name, block in tasks]
+            results = [future.result() for future in futures]
+
+    for name, block in results:
+        for fit in block:
+            _fitted_models[name, int(ordinals[fit['origin']]), keys[fit['origin']]] = fit
+            timing[name]['fits'] += 1
+            timing[name]['fit_seconds'] += fit['fit_seconds']
+
+    # Forecast errors of every model, origin and horizon
+    rows = []
+    for name in models:
+        features = BACKTEST_MODELS[name]['features']
+        for origin in origins:
+            fit = _fitted_models[name, int(ordinals[origin]), keys[origin]]
+            started = time.perf_counter()
+            forecast = features(t[origin:origin + horizons], fit['knots']) @ fit['coefficients']
+            timing[name]['predict_seconds'] += time.perf_counter() - started
+            timing[name]['forecasts'] += 1
+            actual = prices[origin:origin + horizons]
+            rows.append(pd.DataFrame({
+                'model': name,
+                'origin_date': ordinals_to_dates(ordinals[origin - 1:origin]).repeat(len(actual)),
+                'horizon': np.arange(1, len(actual) + 1),
+                'forecast': forecast,
+                'actual': actual,
+            }))
+    errors = pd.concat(rows, ignore_index=True)
+    errors['error'] = errors['forecast'] - errors['actual']
+
+    by_horizon = errors.groupby(['model', 'horizon'])['error'].agg(
+        mae=lambda error: error.abs().mean(),
+        rmse=lambda error: np.sqrt((error ** 2).mean()),
+        bias='mean',
+        count='count',
+    ).reset_index()
+
+    timing = pd.DataFrame(list(timing.values()))
+    timing['mean_fit_ms'] = timing['fit_seconds'] / timing['fits'].where(timing['fits'] > 0) * 1000.0
+    timing['mean_predict_ms'] = timing['predict_seconds'] / timing['forecasts'] * 1000.0
+    return {'errors': errors, 'by_horizon': by_horizon, 'timing': timing}
+
+
+# Backtest the models on a Nat_Gas style price file
+def backtest_price_file(file_path='Nat_Gas.csv', **options):
+    """
+    Runs backtest_price_history on the prices of a CSV file, read through the binary price store.
+    """
+    ordinals, prices = load_price_store(file_path)
+    return backtest_price_history(np.asarray(ordinals), np.asarray(prices), **options)
+
+
+# Command line entry point printing the error by horizon and the timings
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the gas price forecast models.")
+    parser.add_argument('--file', default='Nat_Gas.csv', help="price CSV file (default: Nat_Gas.csv)")
+    parser.add_argument('--models', default=','.join(BACKTEST_MODELS), help="comma-separated models to compare")
+    parser.add_argument('--min-train', type=int, default=24, help="prices before the first origin (default: 24)")
+    parser.add_argument('--horizons', type=int, default=12, help="prices forecast from every origin (default: 12)")
+    parser.add_argument('--step', type=int, default=1, help="prices between origins (default: 1)")
+    parser.add_argument('--workers', type=int, default=None, help="number of worker processes")
+    args = parser.parse_args(argv)
+
+    backtest = backtest_price_file(args.file, models=tuple(args.models.split(',')), min_train=args.min_train,
+                                   horizons=args.horizons, step=args.step, max_workers=args.workers)
+    print("Mean absolute error by horizon:")
+    print(backtest['by_horizon'].pivot(index='horizon', columns='model', values='mae').to_string(float_format='%.4f'))
+    print("\nTiming:")
+    print(backtest['timing'].to_string(index=False, float_format='%.4g'))
+
+
+if __name__ == '__main__':
+    main()
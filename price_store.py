@@ -0,0 +1,193 @@
+# Binary columnar store for natural gas price histories
+# Keeps int64 day ordinals and float64 prices of a price CSV as .npy files that are memory-mapped on load,
+# and only re-parses the CSV when the file actually changes
+
+# Various imports to be used throughout the price store
+import hashlib
+import json
+import os
+import tempfile
+import warnings
+
+import numpy as np
+
+from instrumentation import count, span
+
+# Day ordinal (as returned by date.toordinal()) of the numpy datetime64 epoch, 1970-01-01
+EPOCH_ORDINAL = 719163
+
+# Directory, next to each source CSV, holding its binary columns
+STORE_DIRECTORY = '.price_store'
+
+
+# Convert dates (strings, date/datetime objects or datetime64 values) to day ordinals
+def dates_to_ordinals(dates):
+    """
+    Converts an array of dates to int64 day ordinals in one vectorized pass.
+
+    Dates that are not datetime64 values yet are parsed with pd.to_datetime, so every
+    string it accepts works, such as '2025-02-25' or the '10/31/20' of Nat_Gas.csv.
+
+    Inputs:
+    - dates (list, array or Series): Dates as strings, date/datetime objects or datetime64 values.
+
+    Outputs:
+    - numpy.ndarray: int64 day ordinal of each date.
+    """
+    values = np.asarray(dates)
+    if values.dtype.kind != 'M':
+        # pandas is only needed when dates have to be parsed, so it is not imported with the module
+        import pandas as pd
+
+        try:
+            with warnings.catch_warnings():
+                # Unpadded dates such as '1/31/21' defeat format inference and are parsed element by element
+                warnings.simplefilter('ignore', UserWarning)
+                parsed = pd.to_datetime(values.ravel())
+        except ValueError:
+            # Strings in different formats, parsed one by one
+            parsed = pd.to_datetime(values.ravel(), format='mixed')
+        values = np.asarray(parsed).reshape(values.shape)
+    return values.astype('datetime64[D]').astype(np.int64) + EPOCH_ORDINAL
+
+
+# Convert day ordinals back to datetime64 dates
+def ordinals_to_dates(ordinals):
+    """
+    Converts int64 day ordinals to datetime64[D] values in one vectorized pass.
+    """
+    return (np.asarray(ordinals, dtype=np.int64) - EPOCH_ORDINAL).astype('datetime64[D]')
+
+
+# Paths of the metadata and column files stored for a CSV file
+def store_paths(csv_path):
+    directory = os.path.join(os.path.dirname(os.path.abspath(csv_path)), STORE_DIRECTORY)
+    name = os.path.basename(csv_path)
+    return (os.path.join(directory, name + '.json'),
+            os.path.join(directory, name + '.ordinals.npy'),
+            os.path.join(directory, name + '.prices.npy'))
+
+
+# SHA-256 of a file, read in blocks so large histories are never held in memory
+def file_hash(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, mode='rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Write a file next to its final path and move it into place, so readers never see a partial file.
+# Every writer gets its own temporary file, so processes building the same file at once do not collide.
+def replace_atomically(path, write):
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                                  prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, mode='wb') as file:
+            write(file)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+# Parse the CSV once and write its binary columns
+def build_price_store(csv_path, date_format='%m/%d/%y'):
+    """
+    Parses a price CSV and writes its day ordinals and prices as .npy files.
+
+    Inputs:
+    - csv_path (str): Path to a CSV file with 'Dates' and 'Prices' columns.
+    - date_format (str): strptime format of the 'Dates' column.
+
+    Outputs:
+    - dict: The metadata written next to the columns.
+    """
+    # pandas is only needed when a CSV has to be parsed, so it is not imported with the module
+    import pandas as pd
+
+    metadata_path, ordinals_path, prices_path = store_paths(csv_path)
+    os.makedirs(os.path.dirname(metadata_path), exist_ok=True)
+
+    with span('price_store.parse_csv', path=csv_path):
+        data = pd.read_csv(csv_path)
+        ordinals = dates_to_ordinals(pd.to_datetime(data['Dates'], format=date_format).to_numpy())
+        prices = pd.to_numeric(data['Prices'], errors='coerce').to_numpy(dtype=np.float64)
+    count('price_store.rows_parsed', len(ordinals))
+
+    replace_atomically(ordinals_path, lambda file: np.save(file, ordinals))
+    replace_atomically(prices_path, lambda file: np.save(file, prices))
+
+    # The metadata is written last, so a store is only trusted once both columns are complete
+    source = os.stat(csv_path)
+    metadata = {'mtime_ns': source.st_mtime_ns, 'size': source.st_size, 'sha256': file_hash(csv_path),
+                'date_format': date_format, 'rows': len(ordinals)}
+    replace_atomically(metadata_path, lambda file: file.write(json.dumps(metadata).encode()))
+    return metadata
+
+
+# Make sure the binary columns for a CSV are current, rebuilding them only when the CSV has changed
+def refresh_price_store(csv_path, date_format='%m/%d/%y'):
+    """
+    Brings the store of a price CSV up to date and returns its metadata.
+
+    The columns are rebuilt when the CSV's modification time or size no longer match
+    the stored metadata and its content hash has changed as well; a touched but
+    unchanged file only refreshes the metadata.
+
+    Inputs:
+    - csv_path (str): Path to a CSV file with 'Dates' and 'Prices' columns.
+    - date_format (str): strptime format of the 'Dates' column.
+
+    Outputs:
+    - dict: Metadata of the store, including the 'sha256' of the source CSV.
+    """
+    metadata_path = store_paths(csv_path)[0]
+    source = os.stat(csv_path)
+
+    try:
+        with open(metadata_path) as file:
+            metadata = json.load(file)
+    except (OSError, ValueError):
+        metadata = None
+
+    if metadata is None or metadata.get('date_format') != date_format:
+        metadata = build_price_store(csv_path, date_format)
+    elif metadata['mtime_ns'] != source.st_mtime_ns or metadata['size'] != source.st_size:
+        if metadata['size'] == source.st_size and metadata['sha256'] == file_hash(csv_path):
+            metadata['mtime_ns'] = source.st_mtime_ns
+            replace_atomically(metadata_path, lambda file: file.write(json.dumps(metadata).encode()))
+        else:
+            metadata = build_price_store(csv_path, date_format)
+    return metadata
+
+
+# Load the binary columns for a CSV
+def load_price_store(csv_path, date_format='%m/%d/%y'):
+    """
+    Returns the day ordinals and prices of a price CSV as read-only memory-mapped arrays,
+    rebuilding the store first if the CSV has changed.
+
+    Inputs:
+    - csv_path (str): Path to a CSV file with 'Dates' and 'Prices' columns.
+    - date_format (str): strptime format of the 'Dates' column.
+
+    Outputs:
+    - ordinals (numpy.memmap): int64 day ordinal of each record.
+    - prices (numpy.memmap): float64 price of each record.
+    """
+    count('price_store.loads')
+    refresh_price_store(csv_path, date_format)
+    _, ordinals_path, prices_path = store_paths(csv_path)
+    return np.load(ordinals_path, mmap_mode='r'), np.load(prices_path, mmap_mode='r')
+
+
+# Load a price CSV through the store as the Dates/Prices DataFrame used by the forecasting scripts
+def load_price_frame(csv_path, date_format='%m/%d/%y'):
+    """
+    Returns the price history of a CSV as a DataFrame with 'Dates' (datetime64) and 'Prices' (float) columns.
+    """
+    import pandas as pd
+
+    ordinals, prices = load_price_store(csv_path, date_format)
+    return pd.DataFrame({'Dates': ordinals_to_dates(ordinals).astype('datetime64[ns]'), 'Prices': prices})
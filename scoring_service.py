@@ -0,0 +1,347 @@
+# Always-on local credit scoring service
+# Loads the model and scaler saved by task-3.py once, serves expected-loss requests over HTTP on a local
+# TCP port or Unix socket with asyncio, and groups concurrent requests into micro-batches so each batch
+# is one vectorized predict_proba call. Includes a local load generator:
+#
+#     python scoring_service.py serve --model credit_model.pkl --port 8765
+#     python scoring_service.py load --port 8765 --concurrency 32 --requests 5000
+
+# Some imports to be used throughout the scoring service
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from compiled_scorer import LOAN_FEATURES
+from loan_scoring import load_scoring_model
+
+# Example loan used by the load generator, the new_loan_details of task-3.py
+EXAMPLE_LOAN = {
+    'credit_lines_outstanding': 5,
+    'loan_amt_outstanding': 2000,
+    'total_debt_outstanding': 5000,
+    'income': 30000,
+    'years_employed': 3,
+    'fico_score': 600,
+}
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class ServiceStats:
+    """
+    Request, batch and latency counters of the service.
+    """
+
+    def __init__(self, latency_window=100000):
+        self.started_at = time.perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.loans = 0
+        self.batches = 0
+        # Latencies of the most recent requests, in seconds
+        self.latencies = deque(maxlen=latency_window)
+
+    def snapshot(self):
+        """
+        Return the counters with p50/p99 latency in milliseconds and throughput in requests per second.
+        """
+        elapsed = time.perf_counter() - self.started_at
+        latencies = np.array(self.latencies) * 1000.0
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'loans': self.loans,
+            'batches': self.batches,
+            'mean_batch_size': self.loans / self.batches if self.batches else 0.0,
+            'p50_latency_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+            'p99_latency_ms': float(np.percentile(latencies, 99)) if len(latencies) else None,
+            'throughput_rps': self.requests / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+class MicroBatcher:
+    """
+    Collects loans submitted by concurrent requests and scores them together.
+
+    When the first loan of a batch arrives, the batcher takes everything already queued,
+    waits up to max_wait seconds for more if the batch is not full, then scores the whole
+    batch with one scaler.transform and one predict_proba call.
+    """
+
+    def __init__(self, model, scaler, stats, max_batch_size=256, max_wait=0.001, recovery_rate=0.10):
+        self.model = model
+        self.scaler = scaler
+        self.stats = stats
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.recovery_rate = recovery_rate
+        self.queue = None
+        self.task = None
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+
+    async def score(self, loan_details):
+        """
+        Score one loan; returns (probability_of_default, expected_loss) once its batch has run.
+        A loan with a missing or non-finite feature raises here, before it can fail a whole batch.
+        """
+        row = [float(loan_details[feature]) for feature in LOAN_FEATURES]
+        invalid = [feature for feature, value in zip(LOAN_FEATURES, row) if not math.isfinite(value)]
+        if invalid:
+            raise ValueError(f"Non-finite values for {invalid}")
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((row, future))
+        return await future
+
+    def _drain(self, batch):
+        while len(batch) < self.max_batch_size and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            self._drain(batch)
+            if len(batch) < self.max_batch_size and self.max_wait > 0:
+                await asyncio.sleep(self.max_wait)
+                self._drain(batch)
+
+            try:
+                features = pd.DataFrame([row for row, _ in batch], columns=LOAN_FEATURES)
+                probability_of_default = self.model.predict_proba(self.scaler.transform(features))[:, 1]
+                expected_loss = probability_of_default * features['loan_amt_outstanding'].to_numpy() * (1 - self.recovery_rate)
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+
+            self.stats.batches += 1
+            self.stats.loans += len(batch)
+            for (_, future), pd_value, el_value in zip(batch, probability_of_default.tolist(), expected_loss.tolist()):
+                if not future.done():
+                    future.set_result((pd_value, el_value))
+
+
+class ScoringService:
+    """
+    HTTP front end of the micro-batcher.
+
+    POST /score takes one loan as a JSON object of the model features, or {"loans": [...]},
+    and returns its probability_of_default and expected_loss (lists for several loans).
+    GET /metrics returns the ServiceStats snapshot.
+    """
+
+    def __init__(self, model, scaler, max_batch_size=256, max_wait=0.001, recovery_rate=0.10):
+        self.stats = ServiceStats()
+        self.batcher = MicroBatcher(model, scaler, self.stats, max_batch_size, max_wait, recovery_rate)
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=8765, unix_socket=None):
+        """
+        Start listening on a TCP port, or on a Unix socket path if one is given.
+        """
+        self.batcher.start()
+        if unix_socket is not None:
+            self.server = await asyncio.start_unix_server(self._handle_connection, path=unix_socket)
+        else:
+            self.server = await asyncio.start_server(self._handle_connection, host, port)
+        return self.server
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await self.batcher.stop()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_http_message(reader)
+                except ValueError as error:
+                    # The request cannot be framed, so the connection cannot be reused after it
+                    self.stats.errors += 1
+                    writer.write(http_response(400, {'error': f'invalid request: {error}'}))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, body = request
+                status, payload = await self._route(method, path, body)
+                writer.write(http_response(status, payload))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if path == '/metrics':
+            return (200, self.stats.snapshot()) if method == 'GET' else (405, {'error': 'use GET'})
+        if path != '/score':
+            return 404, {'error': f'unknown path {path}'}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}
+
+        started = time.perf_counter()
+        self.stats.requests += 1
+        try:
+            request = json.loads(body)
+            loans = request['loans'] if 'loans' in request else [request]
+            results = await asyncio.gather(*(self.batcher.score(loan) for loan in loans))
+        except (ValueError, KeyError, TypeError) as error:
+            self.stats.errors += 1
+            return 400, {'error': f'invalid request: {error!r}'}
+        except Exception as error:
+            self.stats.errors += 1
+            return 500, {'error': repr(error)}
+        self.stats.latencies.append(time.perf_counter() - started)
+
+        if 'loans' in request:
+            return 200, {'probability_of_default': [result[0] for result in results],
+                         'expected_loss': [result[1] for result in results]}
+        return 200, {'probability_of_default': results[0][0], 'expected_loss': results[0][1]}
+
+
+# Read one HTTP/1.1 request or response: returns (start line fields..., body) or None at end of stream,
+# and raises ValueError on a malformed Content-Length
+async def read_http_message(reader):
+    start_line = await reader.readline()
+    if not start_line:
+        return None
+    content_length = 0
+    while True:
+        header = await reader.readline()
+        if header in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = header.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            try:
+                content_length = int(value.strip())
+            except ValueError:
+                content_length = -1
+            if content_length < 0:
+                raise ValueError(f"Invalid Content-Length {value.strip()!r}")
+    body = await reader.readexactly(content_length) if content_length else b''
+    first, second, *_ = start_line.decode('latin-1').split() + ['', '']
+    return first, second, body
+
+
+def http_response(status, payload):
+    body = json.dumps(payload).encode()
+    head = f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+    return head.encode('latin-1') + body
+
+
+def http_request(method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b''
+    head = f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+    return head.encode('latin-1') + body
+
+
+# Local load generator: many keep-alive connections sending score requests back to back
+async def generate_load(host='127.0.0.1', port=8765, unix_socket=None, concurrency=32, requests=5000, loan=EXAMPLE_LOAN):
+    """
+    Send requests score requests over concurrency connections and measure client-side latency.
+
+    Returns a dict with the number of requests and errors, client p50/p99 latency in
+    milliseconds, throughput in requests per second and the server's /metrics snapshot.
+    """
+    latencies = []
+    errors = 0
+    per_connection = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    message = http_request('POST', '/score', loan)
+
+    async def open_connection():
+        if unix_socket is not None:
+            return await asyncio.open_unix_connection(unix_socket)
+        return await asyncio.open_connection(host, port)
+
+    async def client(count):
+        nonlocal errors
+        reader, writer = await open_connection()
+        try:
+            for _ in range(count):
+                started = time.perf_counter()
+                writer.write(message)
+                await writer.drain()
+                _, status, _ = await read_http_message(reader)
+                latencies.append(time.perf_counter() - started)
+                if status != '200':
+                    errors += 1
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(count) for count in per_connection if count))
+    elapsed = time.perf_counter() - started
+
+    # Fetch the server-side counters
+    reader, writer = await open_connection()
+    writer.write(http_request('GET', '/metrics'))
+    await writer.drain()
+    _, _, body = await read_http_message(reader)
+    writer.close()
+
+    latencies_ms = np.array(latencies) * 1000.0
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_latency_ms': float(np.percentile(latencies_ms, 50)) if len(latencies_ms) else None,
+        'p99_latency_ms': float(np.percentile(latencies_ms, 99)) if len(latencies_ms) else None,
+        'throughput_rps': len(latencies) / elapsed if elapsed > 0 else 0.0,
+        'server': json.loads(body),
+    }
+
+
+async def serve(model_path, host='127.0.0.1', port=8765, unix_socket=None, max_batch_size=256, max_wait=0.001):
+    model, scaler = load_scoring_model(model_path)
+    service = ScoringService(model, scaler, max_batch_size, max_wait)
+    server = await service.start(host, port, unix_socket)
+    print(f"Scoring service listening on {unix_socket or f'http://{host}:{port}'}")
+    async with server:
+        await server.serve_forever()
+
+
+# Command line entry point for running the service and the load generator
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local credit scoring service with request micro-batching.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help="run the scoring service")
+    serve_parser.add_argument('--model', default='credit_model.pkl', help="model saved by task-3.py (default: credit_model.pkl)")
+    serve_parser.add_argument('--max-batch-size', type=int, default=256)
+    serve_parser.add_argument('--max-wait-ms', type=float, default=1.0)
+
+    load_parser = subparsers.add_parser('load', help="send load to a running service")
+    load_parser.add_argument('--concurrency', type=int, default=32)
+    load_parser.add_argument('--requests', type=int, default=5000)
+
+    for subparser in (serve_parser, load_parser):
+        subparser.add_argument('--host', default='127.0.0.1')
+        subparser.add_argument('--port', type=int, default=8765)
+        subparser.add_argument('--unix-socket', help="Unix socket path, used instead of host/port")
+
+    args = parser.parse_args(argv)
+    if args.command == 'serve':
+        asyncio.run(serve(args.model, args.host, args.port, args.unix_socket, args.max_batch_size, args.max_wait_ms / 1000.0))
+    else:
+        print(json.dumps(asyncio.run(generate_load(args.host, args.port, args.unix_socket, args.concurrency, args.requests)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+# Reproducible chunking of Monte Carlo work
+# Splits a number of paths or scenarios into chunks, each with its own random stream spawned from one
+# seed, so a simulation gives the same result whether its chunks run in one process or across a pool.
+
+# Some imports to be used throughout the chunk planner
+import numpy as np
+
+
+# Split num_items into chunks with independent, reproducible random streams
+def seeded_chunk_plan(num_items, chunk_size, seed):
+    """
+    Returns a list of (SeedSequence, size) pairs, one per chunk of at most chunk_size items.
+
+    Inputs:
+    - num_items (int): Number of paths or scenarios to split.
+    - chunk_size (int): Largest number of items per chunk.
+    - seed (int or SeedSequence): Seed the chunk streams are spawned from.
+
+    Outputs:
+    - list: Seed sequence and number of items of every chunk.
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    sizes = [min(chunk_size, num_items - start) for start in range(0, num_items, chunk_size)]
+    return list(zip(seed.spawn(len(sizes)), sizes))
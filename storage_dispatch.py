@@ -0,0 +1,166 @@
+# Optimal injection/withdrawal dispatch for a natural gas storage contract
+# Finds the value-maximizing schedule with a dynamic program over a discretized inventory grid,
+# instead of valuing a schedule handed in by the caller like price_gas_contract in task-2.py
+
+# Various imports to be used throughout the dispatch engine
+import numpy as np
+import pandas as pd
+
+from forward_curve import dates_to_ordinals, load_forward_curve
+
+
+# Maximum of a window around every position, vectorized with a doubling (sparse table) reduction
+def window_max(values, behind, ahead):
+    """
+    Computes max(values[..., i - behind : i + ahead + 1]) for every position i along the last axis,
+    clipped to the array bounds.
+
+    Inputs:
+    - values (numpy.ndarray): Array of values, windows run along the last axis.
+    - behind (int): Number of positions to look back.
+    - ahead (int): Number of positions to look forward.
+
+    Outputs:
+    - numpy.ndarray: Window maximum at every position.
+    """
+    num_values = values.shape[-1]
+    length = behind + ahead + 1
+    table = np.concatenate([np.full(values.shape[:-1] + (behind,), -np.inf), values,
+                            np.full(values.shape[:-1] + (ahead,), -np.inf)], axis=-1)
+
+    # After each pass table[..., x] holds the maximum of the padded values x .. x + span - 1
+    span = 1
+    while span * 2 <= length:
+        table = np.maximum(table[..., :-span], table[..., span:])
+        span *= 2
+
+    # Two overlapping blocks of width span cover every window of the requested length
+    return np.maximum(table[..., :num_values], table[..., length - span:length - span + num_values])
+
+
+# Decision dates and the number of days each decision covers
+def dispatch_time_steps(start_date, end_date, step='daily'):
+    """
+    Builds the decision dates of the dispatch problem.
+
+    Inputs:
+    - start_date (str or date): First date of the contract ('YYYY-MM-DD' if a string).
+    - end_date (str or date): Last date of the contract ('YYYY-MM-DD' if a string).
+    - step (str): 'daily' for one decision per day, 'monthly' for one decision per month-end.
+
+    Outputs:
+    - dates (DatetimeIndex): Decision dates.
+    - days (numpy.ndarray): Number of days covered by each decision.
+    """
+    if step == 'daily':
+        dates = pd.date_range(start_date, end_date, freq='D')
+        days = np.ones(len(dates), dtype=np.int64)
+    elif step == 'monthly':
+        dates = pd.date_range(start_date, end_date, freq='ME')
+        days = dates.days_in_month.to_numpy().astype(np.int64)
+    else:
+        raise ValueError(f"Unknown time step {step!r}, expected 'daily' or 'monthly'")
+    return dates, days
+
+
+# Discretize the inventory and express the rates as whole grid steps per decision
+def inventory_grid(max_volume, volume_levels, injection_rate, withdrawal_rate, days):
+    """
+    Builds the inventory grid of the dispatch problem.
+
+    A storage without capacity has the single level 0, where no gas can move, whatever
+    volume_levels is.
+
+    Inputs:
+    - max_volume (float): Maximum storage capacity.
+    - volume_levels (int): Number of points in the inventory grid, including empty and full.
+    - injection_rate (float): Maximum rate at which gas can be injected per day.
+    - withdrawal_rate (float): Maximum rate at which gas can be withdrawn per day.
+    - days (numpy.ndarray): Number of days covered by each decision.
+
+    Outputs:
+    - volumes (numpy.ndarray): Inventory of every grid level.
+    - inject_steps (numpy.ndarray): Most levels the inventory can rise by on each decision.
+    - withdraw_steps (numpy.ndarray): Most levels the inventory can fall by on each decision.
+    """
+    if volume_levels < 1:
+        raise ValueError(f"volume_levels must be at least 1, got {volume_levels}")
+    if min(max_volume, injection_rate, withdrawal_rate) < 0:
+        raise ValueError("max_volume, injection_rate and withdrawal_rate must not be negative")
+    if max_volume == 0:
+        volume_levels = 1
+
+    volumes = np.linspace(0.0, max_volume, volume_levels)
+    volume_step = volumes[1] - volumes[0] if volume_levels > 1 else 1.0
+    # Capped before the integer conversion, so very large rates cannot overflow
+    inject_steps = np.minimum(np.floor(injection_rate * days / volume_step + 1e-9), volume_levels - 1).astype(np.int64)
+    withdraw_steps = np.minimum(np.floor(withdrawal_rate * days / volume_step + 1e-9), volume_levels - 1).astype(np.int64)
+    return volumes, inject_steps, withdraw_steps
+
+
+# Function to find the optimal dispatch schedule and its value
+def optimize_storage_dispatch(start_date, end_date, injection_rate, withdrawal_rate, max_volume, storage_costs,
+                              forward_curve=None, step='daily', volume_levels=501):
+    """
+    Finds the injection/withdrawal schedule that maximizes the value of a storage contract.
+
+    Storage starts empty and gas left at the end of the contract is worth nothing. On each
+    decision date the inventory moves by at most injection_rate (up) or withdrawal_rate (down)
+    per day covered, within [0, max_volume]; gas is bought or sold at the curve price of that
+    date, and storage_costs is charged per unit held per day.
+
+    Parameters:
+    - start_date (str or date): First date of the contract ('YYYY-MM-DD' if a string).
+    - end_date (str or date): Last date of the contract ('YYYY-MM-DD' if a string).
+    - injection_rate (float): Maximum rate at which gas can be injected per day.
+    - withdrawal_rate (float): Maximum rate at which gas can be withdrawn per day.
+    - max_volume (float): Maximum storage capacity.
+    - storage_costs (float): Cost of storing gas per unit volume per day.
+    - forward_curve (ForwardCurve): Price curve, defaults to the Nat_Gas.csv curve.
+    - step (str): 'daily' or 'monthly' decision dates.
+    - volume_levels (int): Number of points in the inventory grid, including empty and full.
+
+    Returns:
+    - float: Value of the contract under the optimal schedule.
+    - DataFrame: The schedule, with the price, volume change (positive for injection),
+      inventory after the decision and cash flow on every decision date.
+    """
+    if forward_curve is None:
+        forward_curve = load_forward_curve()
+
+    dates, days = dispatch_time_steps(start_date, end_date, step)
+    prices = forward_curve.prices_at_ordinals(dates_to_ordinals(dates.to_numpy()))
+    num_steps = len(dates)
+
+    volumes, inject_steps, withdraw_steps = inventory_grid(max_volume, volume_levels, injection_rate, withdrawal_rate, days)
+    volume_levels = len(volumes)
+    holding_costs = storage_costs * days
+
+    # Backward induction: moving from inventory v to w on date t pays price * (v - w) - holding_cost * w,
+    # so the best continuation is price * v plus a window maximum of next_value(w) - (price + holding_cost) * w
+    values = np.zeros((num_steps + 1, volume_levels))
+    for t in range(num_steps - 1, -1, -1):
+        continuation = values[t + 1] - (prices[t] + holding_costs[t]) * volumes
+        values[t] = prices[t] * volumes + window_max(continuation, withdraw_steps[t], inject_steps[t])
+
+    # Forward pass: replay the optimal decisions from an empty storage
+    level = 0
+    volume_changes = np.empty(num_steps)
+    inventory = np.empty(num_steps)
+    for t in range(num_steps):
+        low = max(0, level - withdraw_steps[t])
+        high = min(volume_levels - 1, level + inject_steps[t])
+        candidates = values[t + 1][low:high + 1] - (prices[t] + holding_costs[t]) * volumes[low:high + 1]
+        next_level = low + int(np.argmax(candidates))
+        volume_changes[t] = volumes[next_level] - volumes[level]
+        inventory[t] = volumes[next_level]
+        level = next_level
+
+    schedule = pd.DataFrame({
+        'date': dates,
+        'price': prices,
+        'volume_change': volume_changes,
+        'inventory': inventory,
+        'cash_flow': -prices * volume_changes - holding_costs * inventory,
+    })
+    return float(values[0][0]), schedule
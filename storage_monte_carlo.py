@@ -0,0 +1,316 @@
+# Stochastic valuation of natural gas storage contracts
+# Simulates mean-reverting seasonal price paths calibrated to Nat_Gas.csv and values the storage
+# option with least-squares Monte Carlo, split into seeded chunks across a process pool
+
+# Various imports to be used throughout the Monte Carlo engine
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from forward_curve import dates_to_ordinals, read_price_history
+from seeded_chunks import seeded_chunk_plan
+from storage_dispatch import dispatch_time_steps, inventory_grid, window_max
+
+# Length of a year in days, the time unit of the mean reversion speed and volatility
+DAYS_PER_YEAR = 365.25
+
+
+class SeasonalMeanReversionModel:
+    """
+    Log price model: log(price) = trend + annual seasonality + x, where x is an
+    Ornstein-Uhlenbeck process pulled back to zero at rate kappa with volatility sigma.
+    """
+
+    def __init__(self, origin_ordinal, coefficients, kappa, sigma, last_ordinal, last_deviation):
+        """
+        Inputs:
+        - origin_ordinal (int): Day ordinal the trend is measured from.
+        - coefficients (numpy.ndarray): Intercept, trend per year, sine and cosine weights of the log price.
+        - kappa (float): Mean reversion speed per year.
+        - sigma (float): Volatility of the deviation per square-root year.
+        - last_ordinal (int): Day ordinal of the last observed price, where simulations start.
+        - last_deviation (float): Deviation from the seasonal trend on the last observed date.
+        """
+        self.origin_ordinal = int(origin_ordinal)
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)
+        self.kappa = float(kappa)
+        self.sigma = float(sigma)
+        self.last_ordinal = int(last_ordinal)
+        self.last_deviation = float(last_deviation)
+
+    @classmethod
+    def calibrate(cls, ordinals, prices):
+        """
+        Fits the seasonal trend by least squares and the mean reversion from the AR(1) fit of its residuals.
+
+        Inputs:
+        - ordinals (numpy.ndarray): Day ordinals of the observed prices, in ascending order.
+        - prices (numpy.ndarray): Observed prices.
+
+        Outputs:
+        - SeasonalMeanReversionModel: The calibrated model.
+        """
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        log_prices = np.log(np.asarray(prices, dtype=np.float64))
+        model = cls(ordinals[0], np.zeros(4), 0.0, 0.0, ordinals[-1], 0.0)
+
+        # Seasonal trend of the log price
+        coefficients, *_ = np.linalg.lstsq(model.features(ordinals), log_prices, rcond=None)
+        model.coefficients = coefficients
+        deviations = log_prices - model.features(ordinals) @ coefficients
+
+        # Discrete AR(1) on the residuals, mapped to the continuous mean reversion speed and volatility
+        step = np.mean(np.diff(ordinals)) / DAYS_PER_YEAR
+        phi = np.dot(deviations[1:], deviations[:-1]) / np.dot(deviations[:-1], deviations[:-1])
+        phi = float(np.clip(phi, 0.01, 0.999))
+        noise = deviations[1:] - phi * deviations[:-1]
+        model.kappa = -np.log(phi) / step
+        model.sigma = float(np.std(noise)) * np.sqrt(2 * model.kappa / (1 - phi ** 2))
+        model.last_deviation = float(deviations[-1])
+        return model
+
+    @classmethod
+    def from_csv(cls, file_path='Nat_Gas.csv'):
+        """
+        Calibrates the model to a Nat_Gas style CSV file.
+
+        Inputs:
+        - file_path (str): The path to the CSV file.
+
+        Outputs:
+        - SeasonalMeanReversionModel: The calibrated model.
+        """
+        return cls.calibrate(*read_price_history(file_path))
+
+    def features(self, ordinals):
+        """
+        Builds the intercept, trend and annual sine/cosine columns for an array of day ordinals.
+        """
+        years = (np.asarray(ordinals, dtype=np.float64) - self.origin_ordinal) / DAYS_PER_YEAR
+        return np.column_stack([np.ones_like(years), years, np.sin(2 * np.pi * years), np.cos(2 * np.pi * years)])
+
+    def expected_prices(self, ordinals):
+        """
+        Returns the expected price on each day ordinal given the last observed deviation.
+        """
+        horizons = (np.asarray(ordinals, dtype=np.float64) - self.last_ordinal) / DAYS_PER_YEAR
+        mean = self.last_deviation * np.exp(-self.kappa * horizons)
+        variance = self.sigma ** 2 * (1 - np.exp(-2 * self.kappa * horizons)) / (2 * self.kappa)
+        return np.exp(self.features(ordinals) @ self.coefficients + mean + variance / 2)
+
+    def simulate(self, ordinals, num_paths, generator):
+        """
+        Yields simulated prices for num_paths paths on each of the day ordinals in turn.
+
+        The deviation is stepped with the exact OU transition, so only the current step of
+        every path is held in memory.
+
+        Inputs:
+        - ordinals (numpy.ndarray): Ascending day ordinals after the last observed date.
+        - num_paths (int): Number of paths.
+        - generator (numpy.random.Generator): Source of the normal draws.
+
+        Outputs:
+        - numpy.ndarray: Prices of every path, one array per ordinal.
+        """
+        seasonal_trend = self.features(ordinals) @ self.coefficients
+        steps = np.diff(np.concatenate([[self.last_ordinal], ordinals])) / DAYS_PER_YEAR
+        deviations = np.full(num_paths, self.last_deviation)
+        for t, step in enumerate(steps):
+            decay = np.exp(-self.kappa * step)
+            scale = self.sigma * np.sqrt((1 - decay ** 2) / (2 * self.kappa))
+            deviations = deviations * decay + scale * generator.standard_normal(num_paths)
+            yield np.exp(seasonal_trend[t] + deviations)
+
+    def deviation_moments(self, ordinal):
+        """
+        Returns the mean and variance of the deviation on a day ordinal given the last observed deviation.
+        """
+        decay = np.exp(-self.kappa * (ordinal - self.last_ordinal) / DAYS_PER_YEAR)
+        return self.last_deviation * decay, self.sigma ** 2 * (1 - decay ** 2) / (2 * self.kappa)
+
+    def bridge_deviations(self, ordinal, num_paths, generator, next_ordinal=None, next_deviations=None):
+        """
+        Draws the deviation of num_paths paths on a day ordinal, conditionally on their deviations
+        on a later day ordinal when those are given (the Ornstein-Uhlenbeck bridge).
+
+        Drawing the last date first and then stepping backwards gives paths with the same
+        distribution as simulate, in the order the backward induction visits the dates.
+
+        Inputs:
+        - ordinal (int): Day ordinal after the last observed date.
+        - num_paths (int): Number of paths.
+        - generator (numpy.random.Generator): Source of the normal draws.
+        - next_ordinal (int): Later day ordinal the paths are already drawn on.
+        - next_deviations (numpy.ndarray): Deviation of every path on next_ordinal.
+
+        Outputs:
+        - numpy.ndarray: Deviation of every path on the day ordinal.
+        """
+        mean, variance = self.deviation_moments(ordinal)
+        if next_deviations is not None:
+            next_mean, next_variance = self.deviation_moments(next_ordinal)
+            covariance = np.exp(-self.kappa * (next_ordinal - ordinal) / DAYS_PER_YEAR) * variance
+            mean = mean + covariance / next_variance * (next_deviations - next_mean)
+            variance = max(variance - covariance ** 2 / next_variance, 0.0)
+        return mean + np.sqrt(variance) * generator.standard_normal(num_paths)
+
+    def prices_from_deviations(self, ordinal, deviations):
+        """
+        Returns the prices on a day ordinal for the deviations of every path.
+        """
+        return np.exp(self.features([ordinal])[0] @ self.coefficients + deviations)
+
+
+# Regression basis of the continuation value: 1, price and price squared
+def continuation_basis(prices, price_scale):
+    x = prices / price_scale
+    return np.column_stack([np.ones_like(x), x, x * x])
+
+
+# Best decision value for every path and every inventory level on one date
+def decision_values(prices, beta, volumes, holding_cost, inject_steps, withdraw_steps, price_scale):
+    """
+    Computes V(v, p) = p * v + max over reachable w of [C(w, p) - (p + holding_cost) * w] for all paths and levels,
+    where C(w, p) is the regressed continuation value of holding w after the decision.
+    """
+    scores = continuation_basis(prices, price_scale) @ beta - np.outer(prices + holding_cost, volumes)
+    return np.outer(prices, volumes) + window_max(scores, withdraw_steps, inject_steps)
+
+
+# Worker task: regression sums of one chunk of paths on one decision date. The chunk state is its
+# generator and its deviations on the next date, which are bridged back to this date; the new
+# state is returned for the previous date, so every path is drawn once over the whole induction.
+def _regression_chunk(state, num_paths, model, ordinals, t, next_beta, volumes, holding_costs,
+                      inject_steps, withdraw_steps, price_scale):
+    generator, next_deviations = state
+    if next_deviations is None:
+        next_deviations = model.bridge_deviations(ordinals[t + 1], num_paths, generator)
+    deviations = model.bridge_deviations(ordinals[t], num_paths, generator, ordinals[t + 1], next_deviations)
+    basis = continuation_basis(model.prices_from_deviations(ordinals[t], deviations), price_scale)
+
+    # Target: the value realized on the next date under the regressions already fitted for it
+    next_prices = model.prices_from_deviations(ordinals[t + 1], next_deviations)
+    target = decision_values(next_prices, next_beta, volumes, holding_costs[t + 1], inject_steps[t + 1],
+                             withdraw_steps[t + 1], price_scale)
+    return basis.T @ basis, basis.T @ target, (generator, deviations)
+
+
+# Worker task: realized cash flows of one chunk of paths under the fitted decision rule
+def _valuation_chunk(seed, num_paths, model, ordinals, betas, volumes, holding_costs,
+                     inject_steps, withdraw_steps, price_scale):
+    generator = np.random.default_rng(seed)
+    levels = np.zeros(num_paths, dtype=np.int64)
+    cash = np.zeros(num_paths)
+    candidate_levels = np.arange(len(volumes))
+    for t, prices in enumerate(model.simulate(ordinals, num_paths, generator)):
+        # Score every level, then keep only the ones reachable from each path's inventory
+        scores = continuation_basis(prices, price_scale) @ betas[t] - np.outer(prices + holding_costs[t], volumes)
+        reachable = ((candidate_levels >= (levels - withdraw_steps[t])[:, None])
+                     & (candidate_levels <= (levels + inject_steps[t])[:, None]))
+        next_levels = np.argmax(np.where(reachable, scores, -np.inf), axis=1)
+        cash += -prices * (volumes[next_levels] - volumes[levels]) - holding_costs[t] * volumes[next_levels]
+        levels = next_levels
+    return cash.sum(), np.dot(cash, cash), num_paths
+
+
+# Run one task per chunk, in a process pool or in the current process when max_workers is 1
+def _map_chunks(executor, function, plan, *args):
+    if executor is None:
+        return [function(seed, size, *args) for seed, size in plan]
+    futures = [executor.submit(function, seed, size, *args) for seed, size in plan]
+    return [future.result() for future in futures]
+
+
+# Function to value a storage contract with least-squares Monte Carlo
+def value_storage_monte_carlo(start_date, end_date, injection_rate, withdrawal_rate, max_volume, storage_costs,
+                              model=None, num_paths=100000, regression_paths=None, chunk_size=20000,
+                              volume_levels=21, step='monthly', seed=0, max_workers=None):
+    """
+    Values a gas storage contract on simulated price paths with least-squares Monte Carlo.
+
+    Regression coefficients of the continuation value are fitted backwards on one set of
+    paths (summing the normal equations chunk by chunk), then the resulting decision rule
+    is applied to an independent set of valuation paths. Every chunk has its own seed
+    spawned from `seed`, so results do not depend on the number of workers, and memory is
+    bounded by chunk_size * volume_levels rather than by the number of paths. Regression
+    paths are drawn backwards with the Ornstein-Uhlenbeck bridge as the induction visits
+    each date, so the cost grows linearly with the number of decision dates.
+
+    Parameters:
+    - start_date (str or date): First date of the contract, after the last observed price.
+    - end_date (str or date): Last date of the contract.
+    - injection_rate (float): Maximum rate at which gas can be injected per day.
+    - withdrawal_rate (float): Maximum rate at which gas can be withdrawn per day.
+    - max_volume (float): Maximum storage capacity.
+    - storage_costs (float): Cost of storing gas per unit volume per day.
+    - model (SeasonalMeanReversionModel): Price model, defaults to the one calibrated to Nat_Gas.csv.
+    - num_paths (int): Number of valuation paths.
+    - regression_paths (int): Number of regression paths, defaults to num_paths.
+    - chunk_size (int): Number of paths simulated together by one task.
+    - volume_levels (int): Number of points in the inventory grid, including empty and full.
+    - step (str): 'daily' or 'monthly' decision dates.
+    - seed (int): Seed of the random streams.
+    - max_workers (int): Number of worker processes, 1 runs everything in the current process.
+
+    Returns:
+    - dict: 'value' and 'standard_error' of the Monte Carlo estimate, 'intrinsic_value' on the
+      expected price curve and 'extrinsic_value', the difference between the two.
+    """
+    if model is None:
+        model = SeasonalMeanReversionModel.from_csv()
+    if regression_paths is None:
+        regression_paths = num_paths
+
+    dates, days = dispatch_time_steps(start_date, end_date, step)
+    ordinals = dates_to_ordinals(dates.to_numpy())
+    if len(ordinals) == 0 or ordinals[0] <= model.last_ordinal:
+        raise ValueError("Contract dates must fall after the last observed price")
+    num_steps = len(ordinals)
+
+    volumes, inject_steps, withdraw_steps = inventory_grid(max_volume, volume_levels, injection_rate, withdrawal_rate, days)
+    volume_levels = len(volumes)
+    holding_costs = storage_costs * days
+
+    expected = model.expected_prices(ordinals)
+    price_scale = float(expected.mean())
+
+    # Intrinsic value: the same inventory recursion on the expected prices
+    intrinsic = np.zeros(volume_levels)
+    for t in range(num_steps - 1, -1, -1):
+        continuation = intrinsic - (expected[t] + holding_costs[t]) * volumes
+        intrinsic = expected[t] * volumes + window_max(continuation, withdraw_steps[t], inject_steps[t])
+
+    regression_seed, valuation_seed = np.random.SeedSequence(seed).spawn(2)
+    regression_plan = seeded_chunk_plan(regression_paths, chunk_size, regression_seed)
+    valuation_plan = seeded_chunk_plan(num_paths, chunk_size, valuation_seed)
+    grid = (volumes, holding_costs, inject_steps, withdraw_steps, price_scale)
+
+    executor = None if max_workers == 1 else ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        # Backward regression of the continuation value; nothing is worth anything after the last date
+        betas = np.zeros((num_steps, 3, volume_levels))
+        regression_plan = [((np.random.default_rng(chunk_seed), None), size) for chunk_seed, size in regression_plan]
+        for t in range(num_steps - 2, -1, -1):
+            results = _map_chunks(executor, _regression_chunk, regression_plan, model, ordinals, t, betas[t + 1], *grid)
+            gram = sum(result[0] for result in results)
+            moments = sum(result[1] for result in results)
+            betas[t] = np.linalg.lstsq(gram, moments, rcond=None)[0]
+            regression_plan = [(result[2], size) for result, (_, size) in zip(results, regression_plan)]
+
+        # Out-of-sample valuation with the fitted decision rule
+        results = _map_chunks(executor, _valuation_chunk, valuation_plan, model, ordinals, betas, *grid)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    total = sum(result[0] for result in results)
+    total_squares = sum(result[1] for result in results)
+    mean = float(total / num_paths)
+    variance = max(total_squares / num_paths - mean ** 2, 0.0)
+    return {
+        'value': mean,
+        'standard_error': float(np.sqrt(variance / num_paths)),
+        'intrinsic_value': float(intrinsic[0]),
+        'extrinsic_value': mean - float(intrinsic[0]),
+    }
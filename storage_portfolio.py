@@ -0,0 +1,105 @@
+# Portfolio pricer for natural gas storage contracts
+# Values a whole table of contracts with numpy batch operations against one shared forward curve,
+# following the same rules as price_gas_contract in task-2.py
+
+# Various imports to be used throughout the portfolio pricer
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from forward_curve import dates_to_ordinals, load_forward_curve
+
+# Columns every contract table must provide
+CONTRACT_COLUMNS = ['injection_dates', 'withdrawal_dates', 'injection_rate', 'withdrawal_rate', 'max_volume', 'storage_costs']
+
+
+# Flatten one column of per-contract date lists into a single ordinal array plus the owning contract of each date
+def flatten_contract_dates(date_lists):
+    """
+    Flattens per-contract lists of dates for batch price lookups.
+
+    Inputs:
+    - date_lists (Series or list): One list of dates per contract.
+
+    Outputs:
+    - ordinals (numpy.ndarray): int64 day ordinal of every date, contract by contract.
+    - owners (numpy.ndarray): Position of the contract each date belongs to.
+    - counts (numpy.ndarray): Number of dates per contract.
+    """
+    date_lists = list(date_lists)
+    counts = np.fromiter((len(dates) for dates in date_lists), dtype=np.int64, count=len(date_lists))
+    ordinals = dates_to_ordinals(list(chain.from_iterable(date_lists)))
+    owners = np.repeat(np.arange(len(date_lists)), counts)
+    return ordinals, owners, counts
+
+
+# Function to value every contract in the table at once
+def price_contract_portfolio(contracts, forward_curve=None):
+    """
+    Calculates the value of many gas storage contracts in one batch.
+
+    Inputs:
+    - contracts (DataFrame or list of dicts): One row per contract with the columns
+      injection_dates, withdrawal_dates (lists of 'YYYY-MM-DD' dates), injection_rate,
+      withdrawal_rate, max_volume and storage_costs.
+    - forward_curve (ForwardCurve or PriceTrendModel): Shared price curve, defaults to the
+      Nat_Gas.csv curve; the trend model of gas_forecast gives the values of task-two.py.
+
+    Outputs:
+    - DataFrame: Per-contract injection_cost, withdrawal_revenue, storage_cost,
+      final_storage and contract_value, indexed like the input table.
+    """
+    contracts = pd.DataFrame(contracts)
+    missing = [column for column in CONTRACT_COLUMNS if column not in contracts.columns]
+    if missing:
+        raise ValueError(f"Contract table is missing columns: {missing}")
+
+    if forward_curve is None:
+        forward_curve = load_forward_curve()
+
+    num_contracts = len(contracts)
+    injection_rate = contracts['injection_rate'].to_numpy(dtype=np.float64)
+    withdrawal_rate = contracts['withdrawal_rate'].to_numpy(dtype=np.float64)
+    max_volume = contracts['max_volume'].to_numpy(dtype=np.float64)
+    storage_costs = contracts['storage_costs'].to_numpy(dtype=np.float64)
+
+    # Look up every injection and withdrawal price in two curve lookups and sum them per contract
+    inject_ordinals, inject_owners, inject_counts = flatten_contract_dates(contracts['injection_dates'])
+    withdraw_ordinals, withdraw_owners, withdraw_counts = flatten_contract_dates(contracts['withdrawal_dates'])
+    inject_price_sums = np.bincount(inject_owners, weights=forward_curve.prices_at_ordinals(inject_ordinals), minlength=num_contracts)
+    withdraw_price_sums = np.bincount(withdraw_owners, weights=forward_curve.prices_at_ordinals(withdraw_ordinals), minlength=num_contracts)
+
+    values = contract_values(inject_price_sums, withdraw_price_sums, inject_counts, withdraw_counts,
+                             injection_rate, withdrawal_rate, max_volume, storage_costs)
+    return pd.DataFrame(values, index=contracts.index)
+
+
+# Contract values from the per-contract sums of the injection and withdrawal prices
+def contract_values(inject_price_sums, withdraw_price_sums, inject_counts, withdraw_counts,
+                    injection_rate, withdrawal_rate, max_volume, storage_costs):
+    """
+    Applies the price_gas_contract rules of task-2.py to arrays of contracts (or scenarios)
+    that are summarized by their price sums and date counts; arguments broadcast together.
+
+    Outputs:
+    - dict: injection_cost, withdrawal_revenue, storage_cost, final_storage and contract_value arrays.
+    """
+    # Full volumes are paid for and sold on every date, as in the single-contract pricer
+    injection_cost = injection_rate * inject_price_sums
+    withdrawal_revenue = withdrawal_rate * withdraw_price_sums
+
+    # Injections fill the storage up to max_volume, withdrawals then empty it down to zero
+    injected_storage = np.where(inject_counts > 0, np.minimum(inject_counts * injection_rate, max_volume), 0.0)
+    final_storage = np.where(withdraw_counts > 0, np.maximum(0.0, injected_storage - withdraw_counts * withdrawal_rate), injected_storage)
+
+    # Storage cost is charged once on the gas left in storage
+    storage_cost = final_storage * storage_costs
+
+    return {
+        'injection_cost': injection_cost,
+        'withdrawal_revenue': withdrawal_revenue,
+        'storage_cost': storage_cost,
+        'final_storage': final_storage,
+        'contract_value': withdrawal_revenue - injection_cost - storage_cost,
+    }
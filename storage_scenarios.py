@@ -0,0 +1,117 @@
+# Scenario grid and sensitivities for natural gas storage contracts
+# Revalues one contract under every combination of injection rate, withdrawal rate, capacity, storage
+# cost and parallel or proportional shifts of the price curve. The curve is looked up once for the
+# contract dates; a curve shift only moves the price sums, so every scenario is a few array operations.
+# Large grids are split into chunks across a process pool.
+
+# Various imports to be used throughout the scenario engine
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from forward_curve import dates_to_ordinals, load_forward_curve
+from storage_portfolio import contract_values
+
+# Scenario parameters: the price_gas_contract arguments and the curve shift price_scale * price + price_shift
+SCENARIO_COLUMNS = ['injection_rate', 'withdrawal_rate', 'max_volume', 'storage_costs', 'price_shift', 'price_scale']
+
+# Default bump sizes of the central finite differences
+BUMP_SIZES = {'price_shift': 0.01, 'injection_rate': 1.0, 'withdrawal_rate': 1.0, 'max_volume': 1.0, 'storage_costs': 0.001}
+
+
+# Build the Cartesian product of the parameter axes around a base contract
+def scenario_grid(base, **axes):
+    """
+    Returns a DataFrame with one row per combination of the values in axes, e.g.
+    scenario_grid({'injection_rate': 100, ...}, max_volume=[500, 1000], price_shift=[-1, 0, 1]).
+    Parameters without an axis keep their base value; the curve shift defaults to none.
+    """
+    base = {'price_shift': 0.0, 'price_scale': 1.0, **base}
+    unknown = [name for name in list(base) + list(axes) if name not in SCENARIO_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown scenario parameters: {unknown}")
+    missing = [name for name in SCENARIO_COLUMNS if name not in base and name not in axes]
+    if missing:
+        raise ValueError(f"Scenario parameters without a value: {missing}")
+
+    names = list(axes)
+    grid = pd.DataFrame(list(itertools.product(*(np.atleast_1d(axes[name]) for name in names))), columns=names)
+    for name in SCENARIO_COLUMNS:
+        if name not in grid.columns:
+            grid[name] = base[name]
+    return grid[SCENARIO_COLUMNS].astype(np.float64)
+
+
+# Value a block of scenarios from the unshifted price sums of the contract dates
+def _value_scenarios(price_sums, date_counts, parameters):
+    inject_price_sum, withdraw_price_sum = price_sums
+    inject_count, withdraw_count = date_counts
+    scale = parameters['price_scale']
+    shift = parameters['price_shift']
+    return contract_values(scale * inject_price_sum + shift * inject_count, scale * withdraw_price_sum + shift * withdraw_count,
+                           inject_count, withdraw_count, parameters['injection_rate'], parameters['withdrawal_rate'],
+                           parameters['max_volume'], parameters['storage_costs'])
+
+
+# Worker task: values and bumped values of one chunk of scenarios
+def _scenario_chunk(price_sums, date_counts, parameters, bump_sizes):
+    values = _value_scenarios(price_sums, date_counts, parameters)
+    for name, bump in bump_sizes.items():
+        up = _value_scenarios(price_sums, date_counts, {**parameters, name: parameters[name] + bump})['contract_value']
+        down = _value_scenarios(price_sums, date_counts, {**parameters, name: parameters[name] - bump})['contract_value']
+        values[f'sensitivity_{name}'] = (up - down) / (2 * bump)
+    return values
+
+
+# Function to value a contract under every scenario of a grid
+def evaluate_storage_scenarios(injection_dates, withdrawal_dates, scenarios, forward_curve=None, bump_sizes=BUMP_SIZES,
+                               chunk_size=1000000, max_workers=None):
+    """
+    Values a storage contract, with the rules of price_gas_contract in task-2.py, under every
+    scenario and computes central finite-difference sensitivities of the contract value.
+
+    Parameters:
+    - injection_dates (list): Dates for gas injection.
+    - withdrawal_dates (list): Dates for gas withdrawal.
+    - scenarios (DataFrame): One row per scenario with the SCENARIO_COLUMNS, e.g. from scenario_grid.
+    - forward_curve (ForwardCurve): Shared price curve, defaults to the cached Nat_Gas.csv curve.
+    - bump_sizes (dict): Bump of every parameter to differentiate against. The price_shift
+      sensitivity is the delta to a parallel curve shift, the max_volume sensitivity the
+      value of one more unit of capacity.
+    - chunk_size (int): Number of scenarios valued together by one task.
+    - max_workers (int): Number of worker processes when the grid has more than one chunk;
+      1 runs everything in the current process.
+
+    Returns:
+    - DataFrame: The scenarios with injection_cost, withdrawal_revenue, storage_cost,
+      final_storage, contract_value and a sensitivity_<parameter> column per bump.
+    """
+    if forward_curve is None:
+        forward_curve = load_forward_curve()
+    missing = [name for name in SCENARIO_COLUMNS if name not in scenarios.columns]
+    if missing:
+        raise ValueError(f"Scenario table is missing columns: {missing}")
+    if len(scenarios) == 0:
+        raise ValueError("Scenario table is empty")
+
+    # The only curve lookups of the whole grid
+    inject_prices = forward_curve.prices_at_ordinals(dates_to_ordinals(injection_dates))
+    withdraw_prices = forward_curve.prices_at_ordinals(dates_to_ordinals(withdrawal_dates))
+    price_sums = (float(inject_prices.sum()), float(withdraw_prices.sum()))
+    date_counts = (len(inject_prices), len(withdraw_prices))
+
+    parameters = {name: scenarios[name].to_numpy(dtype=np.float64) for name in SCENARIO_COLUMNS}
+    chunks = [{name: values[start:start + chunk_size] for name, values in parameters.items()}
+              for start in range(0, len(scenarios), chunk_size)]
+
+    if max_workers == 1 or len(chunks) <= 1:
+        results = [_scenario_chunk(price_sums, date_counts, chunk, bump_sizes) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_scenario_chunk, price_sums, date_counts, chunk, bump_sizes) for chunk in chunks]
+            results = [future.result() for future in futures]
+
+    columns = {name: np.concatenate([result[name] for result in results]) for name in results[0]}
+    return pd.concat([scenarios.reset_index(drop=True), pd.DataFrame(columns)], axis=1).set_axis(scenarios.index)
@@ -0,0 +1,148 @@
+# Daily inventory simulator for long-horizon natural gas storage contracts
+# Merges the injection and withdrawal nominations of a contract onto one daily timeline and accounts
+# for it with array operations: the inventory is the cumulative sum of the nominations clipped to
+# [0, max_volume], gas is bought and sold in the volumes that actually move, and storage cost is charged
+# on the inventory held at the end of every day. Unlike price_gas_contract in task-2.py, which runs all
+# injections before all withdrawals and charges storage once on the final inventory, events are applied
+# in date order.
+
+# Various imports to be used throughout the simulator
+import numpy as np
+import pandas as pd
+
+from forward_curve import dates_to_ordinals, load_forward_curve
+from price_store import ordinals_to_dates
+
+
+# Running sum of a series of changes, kept within [lower, upper] at every step
+def clipped_cumsum(deltas, lower, upper, initial=0.0):
+    """
+    Computes x[t] = min(max(x[t - 1] + deltas[t], lower), upper) with x[-1] = initial.
+
+    A sum clipped at one bound only is the unclipped cumulative sum plus a running maximum
+    of its overshoots (the Skorokhod reflection), which is one vectorized pass. The path
+    follows the lower-clipped sum until that sum first crosses the upper bound, then the
+    upper-clipped sum until it first crosses the lower bound, and so on, so the number of
+    passes is the number of times the inventory goes from one bound to the other, not the
+    number of days.
+
+    Inputs:
+    - deltas (numpy.ndarray): Change of every step.
+    - lower (float): Lowest allowed value.
+    - upper (float): Highest allowed value.
+    - initial (float): Value before the first step.
+
+    Outputs:
+    - numpy.ndarray: Clipped value after every step.
+    """
+    deltas = np.asarray(deltas, dtype=np.float64)
+    result = np.empty(len(deltas))
+    start = 0
+    value = min(max(float(initial), lower), upper)
+    at_lower_side = True
+    while start < len(deltas):
+        path = value + np.cumsum(deltas[start:])
+        if at_lower_side:
+            # Clip from below only, and stop where that path would pass the upper bound
+            path += np.maximum(np.maximum.accumulate(lower - path), 0.0)
+            crossing = np.flatnonzero(path > upper)
+        else:
+            # Clip from above only, and stop where that path would pass the lower bound
+            path -= np.maximum(np.maximum.accumulate(path - upper), 0.0)
+            crossing = np.flatnonzero(path < lower)
+
+        if len(crossing) == 0:
+            result[start:] = path
+            break
+        end = start + int(crossing[0])
+        result[start:end] = path[:end - start]
+        result[end] = upper if at_lower_side else lower
+        value = result[end]
+        start = end + 1
+        at_lower_side = not at_lower_side
+    return result
+
+
+# Daily nominated volume changes on a timeline starting at first_ordinal
+def _daily_nominations(ordinals, volumes, first_ordinal, num_days):
+    return np.bincount(ordinals - first_ordinal, weights=np.broadcast_to(volumes, ordinals.shape), minlength=num_days)
+
+
+# Function to simulate a storage contract day by day
+def simulate_storage_inventory(injection_dates, withdrawal_dates, injection_rate, withdrawal_rate, max_volume, storage_costs,
+                               forward_curve=None, end_date=None, initial_inventory=0.0):
+    """
+    Values a storage contract on a daily timeline with chronological events.
+
+    Parameters:
+    - injection_dates (list): Dates for gas injection; a date may repeat.
+    - withdrawal_dates (list): Dates for gas withdrawal; a date may repeat.
+    - injection_rate (float or array): Volume nominated for injection on each injection date.
+    - withdrawal_rate (float or array): Volume nominated for withdrawal on each withdrawal date.
+    - max_volume (float): Maximum storage capacity.
+    - storage_costs (float): Cost of storing gas per unit volume per day.
+    - forward_curve (ForwardCurve or PriceTrendModel): Price source, defaults to the cached
+      Nat_Gas.csv curve; the trend model of gas_forecast covers any horizon.
+    - end_date (str or date): Last day storage is charged, defaults to the last event date.
+    - initial_inventory (float): Gas in storage before the first event.
+
+    Returns:
+    - dict: injection_cost, withdrawal_revenue, storage_cost, contract_value, final_inventory,
+      and the injected_volume and withdrawn_volume actually moved.
+    - DataFrame: Daily schedule with date, price, injected, withdrawn, inventory and cash_flow.
+    """
+    if forward_curve is None:
+        forward_curve = load_forward_curve()
+
+    inject_ordinals = dates_to_ordinals(injection_dates)
+    withdraw_ordinals = dates_to_ordinals(withdrawal_dates)
+    event_ordinals = np.concatenate([inject_ordinals, withdraw_ordinals])
+    if len(event_ordinals) == 0:
+        raise ValueError("The contract has no injection or withdrawal dates")
+    first_ordinal = int(event_ordinals.min())
+    last_ordinal = int(event_ordinals.max()) if end_date is None else int(dates_to_ordinals([end_date])[0])
+    if last_ordinal < event_ordinals.max():
+        raise ValueError("end_date falls before the last injection or withdrawal date")
+    num_days = last_ordinal - first_ordinal + 1
+    ordinals = np.arange(first_ordinal, last_ordinal + 1, dtype=np.int64)
+
+    # Net nomination of every day: same-day injections and withdrawals offset each other
+    nominations = (_daily_nominations(inject_ordinals, injection_rate, first_ordinal, num_days)
+                   - _daily_nominations(withdraw_ordinals, withdrawal_rate, first_ordinal, num_days))
+    inventory = clipped_cumsum(nominations, 0.0, max_volume, initial_inventory)
+
+    # Volumes that actually move once capacity and available gas are respected
+    flows = np.diff(inventory, prepend=min(max(float(initial_inventory), 0.0), max_volume))
+    injected = np.maximum(flows, 0.0)
+    withdrawn = np.maximum(-flows, 0.0)
+
+    if hasattr(forward_curve, 'prices_at_ordinals'):
+        prices = forward_curve.prices_at_ordinals(ordinals)
+    else:
+        prices = forward_curve.predict_ordinals(ordinals)
+
+    # Gas is bought and sold at the day's price, and every unit held at the end of a day pays for that day
+    daily_storage_cost = inventory * storage_costs
+    cash_flow = (withdrawn - injected) * prices - daily_storage_cost
+
+    injection_cost = float(np.dot(injected, prices))
+    withdrawal_revenue = float(np.dot(withdrawn, prices))
+    storage_cost = float(daily_storage_cost.sum())
+    summary = {
+        'injection_cost': injection_cost,
+        'withdrawal_revenue': withdrawal_revenue,
+        'storage_cost': storage_cost,
+        'contract_value': withdrawal_revenue - injection_cost - storage_cost,
+        'final_inventory': float(inventory[-1]),
+        'injected_volume': float(injected.sum()),
+        'withdrawn_volume': float(withdrawn.sum()),
+    }
+    schedule = pd.DataFrame({
+        'date': ordinals_to_dates(ordinals),
+        'price': prices,
+        'injected': injected,
+        'withdrawn': withdrawn,
+        'inventory': inventory,
+        'cash_flow': cash_flow,
+    })
+    return summary, schedule
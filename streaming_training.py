@@ -0,0 +1,88 @@
+# Out-of-core training of the probability of default (PD) model
+# Trains on loan files larger than memory by reading them in chunks: one pass for the running
+# feature mean/variance, then incremental logistic regression updates with a held-out evaluation stream
+
+# Some imports to be used throughout the streaming trainer
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, log_loss
+from sklearn.preprocessing import StandardScaler
+
+from compiled_scorer import LOAN_FEATURES
+
+TARGET = 'default'
+
+
+# Decide deterministically which rows belong to the held-out stream
+def held_out_mask(row_numbers, test_size=0.2, random_state=42):
+    """
+    Assign rows to the held-out stream from a hash of their row number, so every pass
+    over the file sees the same split without storing it.
+    """
+    hashed = (np.asarray(row_numbers, dtype=np.uint64) + np.uint64(random_state)) * np.uint64(0x9E3779B97F4A7C15)
+    return (hashed >> np.uint64(40)).astype(np.float64) / float(1 << 24) < test_size
+
+
+# Read the training file chunk by chunk with the row number of every row
+def read_training_chunks(file_path, chunk_size=100000):
+    """
+    Yield (row_numbers, features, target) for chunks of complete rows of a loan CSV file.
+    """
+    first_row = 0
+    for chunk in pd.read_csv(file_path, usecols=LOAN_FEATURES + [TARGET], chunksize=chunk_size):
+        row_numbers = np.arange(first_row, first_row + len(chunk))
+        first_row += len(chunk)
+
+        # Clean data: drop rows with missing values, as preprocess_data does
+        complete = chunk.notna().all(axis=1).to_numpy()
+        yield row_numbers[complete], chunk.loc[complete, LOAN_FEATURES], chunk.loc[complete, TARGET].to_numpy()
+
+
+# Train model without loading the file into memory
+def train_model_streaming(file_path, chunk_size=100000, epochs=5, test_size=0.2, alpha=1e-4, eta0=0.01, random_state=42):
+    """
+    Train a logistic regression model to predict default from a loan CSV file of any size.
+
+    Peak memory depends on chunk_size only. Returns the fitted scaler and model, which
+    plug into calculate_expected_loss, score_loan_file and compile_loan_scorer like the
+    ones from preprocess_data and train_model, and held-out evaluation metrics.
+    """
+    # First pass: running mean and variance of the training rows
+    scaler = StandardScaler()
+    for row_numbers, x, _ in read_training_chunks(file_path, chunk_size):
+        training = ~held_out_mask(row_numbers, test_size, random_state)
+        if training.any():
+            scaler.partial_fit(x[training])
+
+    # Later passes: incremental logistic regression updates, rows shuffled within each chunk.
+    # A small constant step size eta0 lands close to the in-memory LogisticRegression solution
+    model = SGDClassifier(loss='log_loss', alpha=alpha, learning_rate='constant', eta0=eta0, random_state=random_state)
+    generator = np.random.default_rng(random_state)
+    for _ in range(epochs):
+        for row_numbers, x, y in read_training_chunks(file_path, chunk_size):
+            training = ~held_out_mask(row_numbers, test_size, random_state)
+            if not training.any():
+                continue
+            order = generator.permutation(int(training.sum()))
+            model.partial_fit(scaler.transform(x[training])[order], y[training][order], classes=np.array([0, 1]))
+
+    # Evaluate the model on the held-out stream
+    correct = 0
+    total = 0
+    total_log_loss = 0.0
+    for row_numbers, x, y in read_training_chunks(file_path, chunk_size):
+        held_out = held_out_mask(row_numbers, test_size, random_state)
+        if not held_out.any():
+            continue
+        x_scaled = scaler.transform(x[held_out])
+        correct += accuracy_score(y[held_out], model.predict(x_scaled), normalize=False)
+        total_log_loss += log_loss(y[held_out], model.predict_proba(x_scaled), labels=[0, 1], normalize=False)
+        total += int(held_out.sum())
+
+    metrics = {
+        'held_out_rows': total,
+        'accuracy': correct / total if total else float('nan'),
+        'log_loss': total_log_loss / total if total else float('nan'),
+    }
+    return model, scaler, metrics
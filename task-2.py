@@ -2,30 +2,31 @@
 # Task Two for JPMorgan Chase & Co. Quantitative Research Virtual Work Experience: Price a Storage Commodity Contract
 
 # Various imports to be used throughout Task Two
-import csv
 from datetime import datetime
 
+from forward_curve import load_forward_curve
+from instrumentation import count, span
+from price_store import load_price_store
 
 
-# Helper function to parse the CSV data
+
+# Helper function to load the CSV data
 def read_gas_data(file_path):
     """
     Reads gas price data from a CSV file and returns a list of price data.
+    The file is parsed once into the binary price store and memory-mapped afterwards.
 
     Inputs:
     - file_path (str): The path to the CSV file.
 
     Outputs:
     - price_data (list): A list of dictionaries containing 'Date' and 'Price' for each record.
+      The raw 'Dates' and 'Prices' strings of the CSV row are no longer included, as the
+      store only keeps the parsed values.
     """
-    price_data = []
-    with open(file_path, mode='r') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            row['Date'] = datetime.strptime(row['Dates'], '%m/%d/%y')  # Parse the date
-            row['Price'] = float(row['Prices'])  # Convert the price to a float
-            price_data.append(row)
-    return price_data
+    with span('read_gas_data', path=file_path):
+        ordinals, prices = load_price_store(file_path)
+        return [{'Date': datetime.fromordinal(int(ordinal)), 'Price': float(price)} for ordinal, price in zip(ordinals, prices)]
 
 # Function to calculate the cost of gas injected
 def calculate_injection_cost(inject_volume, inject_price):
@@ -109,8 +110,6 @@ def price_gas_contract(file_path, injection_dates, withdrawal_dates, injection_r
     - injection_dates (list): Dates for gas injection.
     - withdrawal_dates (list): Dates for gas withdrawal.
     
-    - prices (dict): Dictionary mapping dates to gas prices.
-    
     - injection_rate (float): Maximum rate at which gas can be injected.
     - withdrawal_rate (float): Maximum rate at which gas can be withdrawn.
     - max_volume (float): Maximum storage capacity.
@@ -119,42 +118,36 @@ def price_gas_contract(file_path, injection_dates, withdrawal_dates, injection_r
     Outputs:
     - float: Value of the contract.
     """
-    # Read price data from the CSV file
-    price_data = read_gas_data(file_path)
-    
-    # Create a dictionary for fast lookup of price by date
-    price_lookup = {row['Date']: row['Price'] for row in price_data}
+    # Shared daily forward curve for the CSV file, built on the first call only
+    forward_curve = load_forward_curve(file_path)
     
     # Initialize variables for tracking gas volume and financial
     current_storage = 0
     total_cost = 0
     total_revenue = 0
-    
-    # Process each injection event
-    for inject_date_str in injection_dates:
-        inject_date = datetime.strptime(inject_date_str, '%Y-%m-%d')
-        inject_price = price_lookup.get(inject_date)  # Get the price for the injection date
-        if inject_price is None:
-            raise ValueError(f"No price data available for injection date {inject_date_str}")
-        
-        inject_volume = injection_rate  # Assuming full injection for each day
-        # Calculate new storage volume after injection
-        current_storage = calculate_injected_volume(current_storage, inject_volume, max_volume)
-        # Add the injection cost to the total cost
-        total_cost += calculate_injection_cost(inject_volume, inject_price)
-
-    # Process each withdrawal event
-    for withdraw_date_str in withdrawal_dates:
-        withdraw_date = datetime.strptime(withdraw_date_str, '%Y-%m-%d')
-        withdraw_price = price_lookup.get(withdraw_date)  # Get the price for the withdrawal date
-        if withdraw_price is None:
-            raise ValueError(f"No price data available for withdrawal date {withdraw_date_str}")
-        
-        withdraw_volume = withdrawal_rate  # Assuming full withdrawal for each day
-        # Calculate the new storage volume after withdrawal
-        current_storage = calculate_withdrawn_volume(current_storage, withdraw_volume)
-        # Add the withdrawal revenue to the total revenue
-        total_revenue += calculate_withdrawal_revenue(withdraw_volume, withdraw_price)
+
+    # Look up the prices for all injection and withdrawal dates on the curve
+    with span('price_gas_contract.price_lookup'):
+        inject_prices = forward_curve.prices(injection_dates)
+        withdraw_prices = forward_curve.prices(withdrawal_dates)
+    count('price_gas_contract.events', len(inject_prices) + len(withdraw_prices))
+    
+    with span('price_gas_contract.event_loop'):
+        # Process each injection event
+        for inject_price in inject_prices:
+            inject_volume = injection_rate  # Assuming full injection for each day
+            # Calculate new storage volume after injection
+            current_storage = calculate_injected_volume(current_storage, inject_volume, max_volume)
+            # Add the injection cost to the total cost
+            total_cost += calculate_injection_cost(inject_volume, inject_price)
+
+        # Process each withdrawal event
+        for withdraw_price in withdraw_prices:
+            withdraw_volume = withdrawal_rate  # Assuming full withdrawal for each day
+            # Calculate the new storage volume after withdrawal
+            current_storage = calculate_withdrawn_volume(current_storage, withdraw_volume)
+            # Add the withdrawal revenue to the total revenue
+            total_revenue += calculate_withdrawal_revenue(withdraw_volume, withdraw_price)
 
     # Calculate the storage cost
     total_cost += calculate_storage_cost(current_storage, storage_costs)
@@ -164,28 +157,14 @@ def price_gas_contract(file_path, injection_dates, withdrawal_dates, injection_r
     
     return contract_value
 
-# Test example
-injection_dates = ["2023-06-30", "2023-07-31"]
-withdrawal_dates = ["2023-08-31", "2023-09-30"]
-injection_rate = 100  # 100 units/day injected
-withdrawal_rate = 100  # 100 units/day withdrawn
-max_volume = 500  # Maximum storage capacity
-storage_costs = 2  # 2 units of currency per unit of gas per day
-
-contract_value = price_gas_contract("Nat_Gas.csv", injection_dates, withdrawal_dates, injection_rate, withdrawal_rate, max_volume, storage_costs)
-print(f"The value of the gas contract is: {contract_value}")
-
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
\ No newline at end of file
+if __name__ == '__main__':
+    # Test example
+    injection_dates = ["2023-06-30", "2023-07-31"]
+    withdrawal_dates = ["2023-08-31", "2023-09-30"]
+    injection_rate = 100  # 100 units/day injected
+    withdrawal_rate = 100  # 100 units/day withdrawn
+    max_volume = 500  # Maximum storage capacity
+    storage_costs = 2  # 2 units of currency per unit of gas per day
+
+    contract_value = price_gas_contract("Nat_Gas.csv", injection_dates, withdrawal_dates, injection_rate, withdrawal_rate, max_volume, storage_costs)
+    print(f"The value of the gas contract is: {contract_value}")
@@ -9,11 +9,15 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, classification_report
 
+from instrumentation import count, span
+from loan_scoring import save_scoring_model
+
 
 # Preprocess Data
-def preprocess_data(df):
+def preprocess_data(df, rating_map=None):
     """
     Preprocess the data by handling missing values and scaling the features.
+    With a rating_map (from task-4.py), the FICO rating replaces the FICO score as a feature.
     """
     # Clean data: drop any rows with missing values (optional, depends on your data quality)
     df = df.dropna()
@@ -22,38 +26,51 @@ def preprocess_data(df):
     features = ['credit_lines_outstanding', 'loan_amt_outstanding', 'total_debt_outstanding', 'income', 'years_employed', 'fico_score']
     target = 'default'
 
+    # Use the FICO rating in place of the raw FICO score
+    if rating_map is not None:
+        df = rating_map.add_rating_column(df)
+        features = features[:-1] + ['fico_rating']
+
     # Extract the features and target
     x = df[features]
     y = df[target]
 
     # Standardize the features using StandardScaler
     scaler = StandardScaler()
-    x_scaled = scaler.fit_transform(x)
+    with span('preprocess_data.scale', rows=len(x)):
+        x_scaled = scaler.fit_transform(x)
     
     return x_scaled, y, scaler
 
 # Train model
-def train_model(x_train, y_train):
+def train_model(x_train, y_train, **model_parameters):
     """
     Train a logistic regression model to predict default.
+    Parameters such as those from best_model_parameters in model_tuning.py are passed to LogisticRegression.
     """
-    model = LogisticRegression()
-    model.fit(x_train, y_train)
+    model = LogisticRegression(**model_parameters)
+    with span('train_model.fit', rows=len(y_train)):
+        model.fit(x_train, y_train)
     return model
 
 # Calculate Expected Loss with this formula....
 # The formula for expected loss is:
 # Expected Loss=PD×Loan Amount×(1−Recovery Rate)
-def calculate_expected_loss(model, scaler, loan_details, recovery_rate=0.10):
+def calculate_expected_loss(model, scaler, loan_details, recovery_rate=0.10, rating_map=None):
     """
     Calculate the expected loss based on the predicted probability of default (PD)
     """
     # Prepare loan_details as a dataframe and scale the features
     loan_data = pd.DataFrame([loan_details])
+    if rating_map is not None:
+        # The model was trained on the FICO rating rather than the score
+        loan_data = rating_map.add_rating_column(loan_data).drop(columns='fico_score')
     loan_data_scaled = scaler.transform(loan_data)
 
     # Predict the probability of default (PD)
-    probability_of_default = model.predict_proba(loan_data_scaled)[0][1]
+    with span('calculate_expected_loss.predict'):
+        probability_of_default = model.predict_proba(loan_data_scaled)[0][1]
+    count('calculate_expected_loss.loans')
 
     # Calculate expected loss
     loan_amt = loan_details['loan_amt_outstanding']
@@ -62,41 +79,55 @@ def calculate_expected_loss(model, scaler, loan_details, recovery_rate=0.10):
     return expected_loss
 
 
-# Load the data
-# Load the dataset from the specified file path.
-loanData = pd.read_csv('Task 3 and 4_Loan_Data.csv')
-
-# Preprocess the data
-x, y, scaler = preprocess_data(loanData)
-
-# Split the data into training and testing sets
-x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=0.2, random_state=42)
-
-# Train the logistic regression model
-model = train_model(x_train, y_train)
-
-# Evaluate the model
-y_pred = model.predict(x_test)
-print("Model Accuracy: ", accuracy_score(y_test, y_pred))
-print(classification_report(y_test, y_pred))
-
-# Example of how to calculate the expected loss for a new loan
-new_loan_details = {
-    # Example number of credit lines the borrower has
-    'credit_lines_outstanding': 5,
-     # Example loan amount outstanding               
-    'loan_amt_outstanding': 2000,
-    # Example total debt outstanding             
-    'total_debt_outstanding': 5000,
-    # Example annual income of the borrower              
-    'income': 30000,
-    # Example years employed                             
-    'years_employed': 3,
-    # Example FICO credit score                        
-    'fico_score': 600                            
-}
-
-# Using the example data for a new loan we can notice the accuracy 
-expected_loss = calculate_expected_loss(model, scaler, new_loan_details)
-print(f"Expected Loss for the new loan: ${expected_loss:.2f}")
-
+# Expected loss with the PD looked up directly from the FICO rating of the borrower
+def calculate_expected_loss_from_rating(rating_map, loan_details, recovery_rate=0.10):
+    """
+    Calculate the expected loss using the observed PD of the borrower's FICO rating
+    """
+    probability_of_default = rating_map.score_probability_of_default([loan_details['fico_score']])[0]
+    return probability_of_default * (loan_details['loan_amt_outstanding'] * (1 - recovery_rate))
+
+
+# The script below trains, evaluates and saves the model; the functions above can be imported on their own
+if __name__ == '__main__':
+    # Load the data
+    # Load the dataset from the specified file path.
+    with span('read_loan_data'):
+        loanData = pd.read_csv('Task 3 and 4_Loan_Data.csv')
+
+    # Preprocess the data
+    x, y, scaler = preprocess_data(loanData)
+
+    # Split the data into training and testing sets
+    x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=0.2, random_state=42)
+
+    # Train the logistic regression model
+    model = train_model(x_train, y_train)
+
+    # Evaluate the model
+    y_pred = model.predict(x_test)
+    print("Model Accuracy: ", accuracy_score(y_test, y_pred))
+    print(classification_report(y_test, y_pred))
+
+    # Persist the model and scaler for the scoring service and batch scorers
+    save_scoring_model(model, scaler, 'credit_model.pkl')
+
+    # Example of how to calculate the expected loss for a new loan
+    new_loan_details = {
+        # Example number of credit lines the borrower has
+        'credit_lines_outstanding': 5,
+         # Example loan amount outstanding               
+        'loan_amt_outstanding': 2000,
+        # Example total debt outstanding             
+        'total_debt_outstanding': 5000,
+        # Example annual income of the borrower              
+        'income': 30000,
+        # Example years employed                             
+        'years_employed': 3,
+        # Example FICO credit score                        
+        'fico_score': 600                            
+    }
+
+    # Using the example data for a new loan we can notice the accuracy 
+    expected_loss = calculate_expected_loss(model, scaler, new_loan_details)
+    print(f"Expected Loss for the new loan: ${expected_loss:.2f}")
@@ -1,22 +1,19 @@
-import pandas as pd
-import numpy as np
-from sklearn.linear_model import LinearRegression
-import matplotlib.pyplot as plt
+# The trend model is fitted once, persisted next to the price store and reloaded here without a refit
+from gas_forecast import load_price_model
+from instrumentation import count, span
 
-# Read the data from the CSV file
-gas_price_data = pd.read_csv('Nat_Gas.csv', parse_dates=['Dates'])
-gas_price_data['Prices'] = pd.to_numeric(gas_price_data['Prices'], errors='coerce')
-
-# Convert the "Dates" to the number of days since the first recorded date for linear regression
-gas_price_data["Days_Since_Start"] = (gas_price_data["Dates"] - gas_price_data["Dates"].min()).dt.days
+# Predict prices for many dates at once
+def price_predictions_from_dates(dates):
+    """
+    Predicts the price of natural gas for an array of dates in one vectorized pass.
 
-# Prepare the features (Days since start) and target (Price) for the linear regression model
-x_features = gas_price_data[["Days_Since_Start"]]  
-y_features = gas_price_data["Prices"]
+    Parameters:
+    - dates (list, array or Series): The dates for which to predict prices (format: 'YYYY-MM-DD')
 
-# Initialize and fit the Linear Regression model
-linear_regression_model = LinearRegression()
-linear_regression_model.fit(x_features, y_features)
+    Returns:
+    - numpy.ndarray: Predicted price for each date, in the same order.
+    """
+    return load_price_model('Nat_Gas.csv').predict(dates)
 
 # Predict price for a given date
 def price_prediction_from_date(date):
@@ -29,10 +26,7 @@ def price_prediction_from_date(date):
     Returns:
     - float: Predicted price for that date.
     """
-    date = pd.to_datetime(date)
-    days_since_start_date = (date - gas_price_data["Dates"].min()).days
-    predicted_price = linear_regression_model.predict(pd.DataFrame([[days_since_start_date]]))
-    return predicted_price[0]
+    return price_predictions_from_dates([date])[0]
 
 # Function to calculate the cost of gas injected
 def calculate_injection_cost(inject_volume, inject_price):
@@ -75,24 +69,29 @@ def price_gas_contract(injection_dates, withdrawal_dates, injection_rate, withdr
     current_storage = 0
     total_cost = 0
     total_revenue = 0
+
+    # Predict the prices for all injection and withdrawal dates up front
+    with span('price_gas_contract.price_prediction'):
+        inject_prices = price_predictions_from_dates(injection_dates)
+        withdraw_prices = price_predictions_from_dates(withdrawal_dates)
+    count('price_gas_contract.events', len(inject_prices) + len(withdraw_prices))
     
-    # Process each injection event
-    for inject_date_str in injection_dates:
-        inject_price = price_prediction_from_date(inject_date_str)
-        inject_volume = injection_rate  # Assuming full injection for each day
-        # Calculate new storage volume after injection
-        current_storage = calculate_injected_volume(current_storage, inject_volume, max_volume)
-        # Add the injection cost to the total cost
-        total_cost += calculate_injection_cost(inject_volume, inject_price)
-
-    # Process each withdrawal event
-    for withdraw_date_str in withdrawal_dates:
-        withdraw_price = price_prediction_from_date(withdraw_date_str)
-        withdraw_volume = withdrawal_rate  # Assuming full withdrawal for each day
-        # Calculate the new storage volume after withdrawal
-        current_storage = calculate_withdrawn_volume(current_storage, withdraw_volume)
-        # Add the withdrawal revenue to the total revenue
-        total_revenue += calculate_withdrawal_revenue(withdraw_volume, withdraw_price)
+    with span('price_gas_contract.event_loop'):
+        # Process each injection event
+        for inject_price in inject_prices:
+            inject_volume = injection_rate  # Assuming full injection for each day
+            # Calculate new storage volume after injection
+            current_storage = calculate_injected_volume(current_storage, inject_volume, max_volume)
+            # Add the injection cost to the total cost
+            total_cost += calculate_injection_cost(inject_volume, inject_price)
+
+        # Process each withdrawal event
+        for withdraw_price in withdraw_prices:
+            withdraw_volume = withdrawal_rate  # Assuming full withdrawal for each day
+            # Calculate the new storage volume after withdrawal
+            current_storage = calculate_withdrawn_volume(current_storage, withdraw_volume)
+            # Add the withdrawal revenue to the total revenue
+            total_revenue += calculate_withdrawal_revenue(withdraw_volume, withdraw_price)
 
     # Calculate the storage cost
     total_cost += calculate_storage_cost(current_storage, storage_costs)
@@ -102,13 +101,14 @@ def price_gas_contract(injection_dates, withdrawal_dates, injection_rate, withdr
     
     return contract_value
 
-# Test example
-injection_dates = ["2023-06-30", "2023-07-31"]
-withdrawal_dates = ["2023-08-31", "2023-09-30"]
-injection_rate = 100  # 100 units/day injected
-withdrawal_rate = 100  # 100 units/day withdrawn
-max_volume = 500  # Maximum storage capacity
-storage_costs = 2  # 2 units of currency per unit of gas per day
-
-contract_value = price_gas_contract(injection_dates, withdrawal_dates, injection_rate, withdrawal_rate, max_volume, storage_costs)
-print(f"The value of the gas contract is: {contract_value}")
+if __name__ == '__main__':
+    # Test example
+    injection_dates = ["2023-06-30", "2023-07-31"]
+    withdrawal_dates = ["2023-08-31", "2023-09-30"]
+    injection_rate = 100  # 100 units/day injected
+    withdrawal_rate = 100  # 100 units/day withdrawn
+    max_volume = 500  # Maximum storage capacity
+    storage_costs = 2  # 2 units of currency per unit of gas per day
+
+    contract_value = price_gas_contract(injection_dates, withdrawal_dates, injection_rate, withdrawal_rate, max_volume, storage_costs)
+    print(f"The value of the gas contract is: {contract_value}")
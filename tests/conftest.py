@@ -0,0 +1,13 @@
+# Shared test setup: the modules live at the top of the repository and read Nat_Gas.csv by relative path
+import os
+import sys
+
+import pytest
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPOSITORY)
+
+
+@pytest.fixture(autouse=True)
+def repository_directory(monkeypatch):
+    monkeypatch.chdir(REPOSITORY)
@@ -0,0 +1,60 @@
+# The compiled scorer against the scaler and LogisticRegression it was compiled from
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from compiled_scorer import LOAN_FEATURES, CompiledLoanScorer, compile_loan_scorer
+
+
+# Loans on the scales of the Task 3 and 4 data, with defaults driven by debt, income and FICO score
+def synthetic_loans(num_loans, seed=0):
+    generator = np.random.default_rng(seed)
+    loans = pd.DataFrame({
+        'credit_lines_outstanding': generator.integers(0, 6, num_loans),
+        'loan_amt_outstanding': generator.uniform(500, 10000, num_loans),
+        'total_debt_outstanding': generator.uniform(1000, 40000, num_loans),
+        'income': generator.uniform(10000, 150000, num_loans),
+        'years_employed': generator.integers(0, 11, num_loans),
+        'fico_score': generator.integers(400, 851, num_loans),
+    })
+    logit = (loans['total_debt_outstanding'] / 5000 - loans['income'] / 30000 - (loans['fico_score'] - 650) / 50
+             + generator.logistic(size=num_loans))
+    loans['default'] = (logit > 0).astype(int)
+    return loans
+
+
+@pytest.fixture(scope='module')
+def fitted_model():
+    loans = synthetic_loans(5000)
+    scaler = StandardScaler().fit(loans[LOAN_FEATURES])
+    model = LogisticRegression(max_iter=1000).fit(scaler.transform(loans[LOAN_FEATURES]), loans['default'])
+    return model, scaler
+
+
+def test_batch_probabilities_match_predict_proba(fitted_model):
+    model, scaler = fitted_model
+    loans = synthetic_loans(2000, seed=1)
+    expected = model.predict_proba(scaler.transform(loans[LOAN_FEATURES]))[:, 1]
+    probabilities = compile_loan_scorer(model, scaler).probabilities_of_default(loans[LOAN_FEATURES].to_numpy())
+    np.testing.assert_allclose(probabilities, expected, rtol=1e-9, atol=1e-15)
+
+
+def test_single_loan_matches_batch(fitted_model):
+    model, scaler = fitted_model
+    scorer = compile_loan_scorer(model, scaler)
+    loans = synthetic_loans(50, seed=2)[LOAN_FEATURES]
+    batch = scorer.expected_losses(loans.to_numpy())
+    single = [scorer.expected_loss(loan) for loan in loans.to_dict('records')]
+    np.testing.assert_allclose(single, batch, rtol=1e-12)
+
+
+def test_saved_scorer_scores_the_same(fitted_model, tmp_path):
+    model, scaler = fitted_model
+    scorer = compile_loan_scorer(model, scaler)
+    scorer.save(tmp_path / 'scorer.npz')
+    loaded = CompiledLoanScorer.load(tmp_path / 'scorer.npz')
+    x = synthetic_loans(100, seed=3)[LOAN_FEATURES].to_numpy()
+    assert loaded.features == LOAN_FEATURES
+    np.testing.assert_array_equal(loaded.probabilities_of_default(x), scorer.probabilities_of_default(x))
@@ -0,0 +1,35 @@
+# Score-to-rating maps built from bucket boundaries
+import numpy as np
+import pytest
+
+from fico_quantization import FicoHistogram, RatingMap
+
+
+@pytest.fixture
+def histogram():
+    generator = np.random.default_rng(0)
+    scores = generator.integers(450, 800, 5000)
+    defaults = (generator.random(5000) < (800 - scores) / 500).astype(int)
+    return FicoHistogram.from_scores(scores, defaults)
+
+
+def test_ratings_follow_the_buckets(histogram):
+    rating_map = RatingMap.from_boundaries([(450, 599), (600, 699), (700, 799)], histogram)
+    np.testing.assert_array_equal(rating_map.map_scores([450, 599, 600, 750, 850]), [3, 3, 2, 1, 1])
+    assert rating_map.num_ratings == 3
+    assert not np.isnan(rating_map.probability_of_default[1:]).any()
+
+
+def test_buckets_sharing_a_lower_edge_are_merged(histogram):
+    # Two chunks quantized separately, both starting a bucket at 600
+    boundaries = [(450, 599), (600, 600), (600, 699), (700, 799)]
+    rating_map = RatingMap.from_boundaries(boundaries, histogram)
+    expected = RatingMap.from_boundaries([(450, 599), (600, 699), (700, 799)], histogram)
+    assert rating_map.num_ratings == 3
+    np.testing.assert_array_equal(rating_map.ratings, expected.ratings)
+    np.testing.assert_array_equal(rating_map.probability_of_default, expected.probability_of_default)
+
+
+def test_descending_boundaries_are_rejected(histogram):
+    with pytest.raises(ValueError, match='ascending'):
+        RatingMap.from_boundaries([(600, 699), (450, 599)], histogram)
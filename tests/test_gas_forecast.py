@@ -0,0 +1,73 @@
+# The online trend estimator against full refits of the observations in its window
+import importlib
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+import forward_curve
+import gas_forecast
+from gas_forecast import OnlineTrendEstimator, PriceTrendModel
+from price_store import dates_to_ordinals, load_price_store
+
+
+# Least-squares trend computed from scratch in exact arithmetic
+def exact_refit(xs, ys):
+    xs = [int(x) for x in xs]
+    ys = [Fraction(float(y)) for y in ys]
+    n = len(xs)
+    slope = (n * sum(x * y for x, y in zip(xs, ys)) - sum(xs) * sum(ys)) / (n * sum(x * x for x in xs) - sum(xs) ** 2)
+    intercept = (sum(ys) - slope * sum(xs)) / n
+    return float(intercept), float(slope)
+
+
+@pytest.fixture
+def shared_models():
+    # publish replaces the shared models, so restore them after the test
+    price_models = dict(gas_forecast._price_models)
+    forward_curves = dict(forward_curve._forward_curves)
+    yield
+    gas_forecast._price_models.clear()
+    gas_forecast._price_models.update(price_models)
+    forward_curve._forward_curves.clear()
+    forward_curve._forward_curves.update(forward_curves)
+
+
+def test_window_equals_exact_refit_after_many_updates():
+    generator = np.random.default_rng(0)
+    ordinals = np.cumsum(generator.integers(1, 40, 2000)) + 738000
+    # Prices of very different magnitudes, where rounding drift in float sums would show
+    prices = (10 + 0.002 * (ordinals - ordinals[0])) * 10.0 ** generator.uniform(-3, 3, len(ordinals))
+    estimator = OnlineTrendEstimator(ordinals[0], window_size=50)
+    for i, (ordinal, price) in enumerate(zip(ordinals, prices)):
+        estimator.add_ordinal(ordinal, price)
+        if i >= 1 and i % 97 == 0:
+            start = max(0, i + 1 - 50)
+            assert estimator.coefficients() == exact_refit(ordinals[start:i + 1] - ordinals[0], prices[start:i + 1])
+
+
+def test_time_window_equals_exact_refit():
+    ordinals, prices = load_price_store('Nat_Gas.csv')
+    estimator = OnlineTrendEstimator.from_price_file('Nat_Gas.csv')
+    estimator.remove_before('2022-01-01')
+    kept = ordinals >= dates_to_ordinals(['2022-01-01'])[0]
+    assert estimator.coefficients() == exact_refit(ordinals[kept] - ordinals[0], prices[kept])
+
+
+def test_full_history_matches_batch_fit():
+    ordinals, prices = load_price_store('Nat_Gas.csv')
+    estimator = OnlineTrendEstimator.from_price_file('Nat_Gas.csv')
+    refit = PriceTrendModel.fit(ordinals, prices)
+    np.testing.assert_allclose(estimator.coefficients(), (refit.intercept, refit.slope), rtol=1e-10)
+
+
+def test_published_model_reaches_contract_pricers(shared_models):
+    task_2 = importlib.import_module('task-2')
+    task_two = importlib.import_module('task-two')
+    estimator = OnlineTrendEstimator.from_price_file('Nat_Gas.csv')
+    estimator.add('2025-06-30', 40.0)
+    model = estimator.publish()
+
+    price = model.predict(['2026-06-30'])[0]
+    assert task_two.price_gas_contract(['2026-06-30'], [], 1, 1, 10, 0) == pytest.approx(-price)
+    assert task_2.price_gas_contract('Nat_Gas.csv', ['2026-06-30'], [], 1, 1, 10, 0) == pytest.approx(-price)
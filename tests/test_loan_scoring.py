@@ -0,0 +1,39 @@
+# Saving and loading the task-3.py model and scaler for the scoring processes
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from compiled_scorer import LOAN_FEATURES
+from loan_scoring import load_scoring_model, save_scoring_model
+
+
+def fit_model(features, seed=0):
+    generator = np.random.default_rng(seed)
+    x = pd.DataFrame(generator.normal(size=(200, len(features))), columns=features)
+    y = (x.iloc[:, 0] + generator.normal(size=200) > 0).astype(int)
+    scaler = StandardScaler().fit(x)
+    return LogisticRegression().fit(scaler.transform(x), y), scaler
+
+
+def test_saved_model_loads(tmp_path):
+    model, scaler = fit_model(LOAN_FEATURES)
+    save_scoring_model(model, scaler, str(tmp_path / 'model.pkl'))
+    loaded_model, loaded_scaler = load_scoring_model(str(tmp_path / 'model.pkl'))
+    np.testing.assert_array_equal(loaded_model.coef_, model.coef_)
+    assert list(loaded_scaler.feature_names_in_) == LOAN_FEATURES
+
+
+def test_rating_model_is_rejected_on_load(tmp_path):
+    model, scaler = fit_model(LOAN_FEATURES[:-1] + ['fico_rating'])
+    save_scoring_model(model, scaler, str(tmp_path / 'model.pkl'))
+    with pytest.raises(ValueError, match='fico_rating'):
+        load_scoring_model(str(tmp_path / 'model.pkl'))
+
+
+def test_scaler_without_feature_names_is_rejected(tmp_path):
+    model, scaler = fit_model(LOAN_FEATURES)
+    scaler = StandardScaler().fit(np.zeros((2, len(LOAN_FEATURES))))
+    with pytest.raises(ValueError, match='feature names'):
+        save_scoring_model(model, scaler, str(tmp_path / 'model.pkl'))
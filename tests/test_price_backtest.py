@@ -0,0 +1,44 @@
+# Reuse of cached backtest fits across runs
+import numpy as np
+import pytest
+
+import price_backtest
+from price_backtest import backtest_price_history
+from price_store import load_price_store
+
+
+@pytest.fixture
+def price_history():
+    price_backtest._fitted_models.clear()
+    ordinals, prices = load_price_store('Nat_Gas.csv')
+    yield np.asarray(ordinals), np.asarray(prices)
+    price_backtest._fitted_models.clear()
+
+
+def test_appending_a_price_only_fits_the_new_origin(price_history):
+    ordinals, prices = price_history
+    backtest_price_history(ordinals[:-1], prices[:-1], max_workers=1)
+    cached = backtest_price_history(ordinals, prices, max_workers=1)
+    assert (cached['timing']['fits'] == 1).all()
+
+    price_backtest._fitted_models.clear()
+    fresh = backtest_price_history(ordinals, prices, max_workers=1)
+    np.testing.assert_allclose(cached['errors']['error'], fresh['errors']['error'], atol=1e-10)
+
+
+def test_changed_price_refits_the_later_origins(price_history):
+    ordinals, prices = price_history
+    backtest_price_history(ordinals, prices, max_workers=1)
+    changed = prices.copy()
+    changed[30] += 1.0
+    timing = backtest_price_history(ordinals, changed, max_workers=1)['timing']
+    # Origins 24 to 30 were fitted on the unchanged prices before index 30
+    assert (timing['cache_hits'] == 7).all()
+
+
+def test_cached_fits_serve_any_horizons(price_history):
+    ordinals, prices = price_history
+    backtest_price_history(ordinals, prices, horizons=6, max_workers=1)
+    backtest = backtest_price_history(ordinals, prices, horizons=12, max_workers=1)
+    assert (backtest['timing']['fits'] == 0).all()
+    assert backtest['by_horizon']['horizon'].max() == 12
@@ -0,0 +1,51 @@
+# Building the binary price store and the trend model from several processes at once
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import csv
+from datetime import date, datetime
+
+import numpy as np
+
+from gas_forecast import load_price_model, price_prediction_from_date
+from price_store import dates_to_ordinals, load_price_store, store_paths
+
+
+# Worker task: load the model of a price file, building its store and artifact if needed
+def load_model_coefficients(file_path):
+    model = load_price_model(file_path)
+    return model.intercept, model.slope
+
+
+def test_concurrent_builds_do_not_collide(tmp_path):
+    for attempt in range(3):
+        file_path = str(tmp_path / f'prices-{attempt}.csv')
+        shutil.copy('Nat_Gas.csv', file_path)
+        with ProcessPoolExecutor(max_workers=12) as executor:
+            coefficients = list(executor.map(load_model_coefficients, [file_path] * 12))
+        assert len(set(coefficients)) == 1
+
+        ordinals, prices = load_price_store(file_path)
+        reference_ordinals, reference_prices = load_price_store('Nat_Gas.csv')
+        np.testing.assert_array_equal(ordinals, reference_ordinals)
+        np.testing.assert_array_equal(prices, reference_prices)
+        # No temporary file is left behind
+        store_directory = tmp_path / '.price_store'
+        assert not [path.name for path in store_directory.iterdir() if path.name.endswith('.tmp')]
+        assert os.path.exists(store_paths(file_path)[0])
+
+
+def test_dates_in_the_csv_format_are_parsed():
+    with open('Nat_Gas.csv') as file:
+        rows = list(csv.DictReader(file))
+    expected = [datetime.strptime(row['Dates'], '%m/%d/%y').toordinal() for row in rows]
+    np.testing.assert_array_equal(dates_to_ordinals([row['Dates'] for row in rows]), expected)
+    np.testing.assert_array_equal(load_price_store('Nat_Gas.csv')[0], expected)
+
+
+def test_mixed_date_inputs_are_parsed():
+    expected = date(2023, 6, 30).toordinal()
+    dates = ['06/30/2023', '2023-06-30', date(2023, 6, 30), datetime(2023, 6, 30, 12), np.datetime64('2023-06-30')]
+    np.testing.assert_array_equal(dates_to_ordinals(dates), [expected] * len(dates))
+    assert price_prediction_from_date('06/30/2023') == price_prediction_from_date('2023-06-30')
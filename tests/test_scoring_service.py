@@ -0,0 +1,74 @@
+# The scoring service under load from its own load generator, with malformed requests mixed in
+import asyncio
+import json
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from compiled_scorer import LOAN_FEATURES
+from scoring_service import EXAMPLE_LOAN, ScoringService, generate_load, http_request, read_http_message
+
+
+def fit_model(seed=0):
+    generator = np.random.default_rng(seed)
+    x = pd.DataFrame(generator.normal(size=(500, len(LOAN_FEATURES))) * 100 + 600, columns=LOAN_FEATURES)
+    y = (x['fico_score'] + generator.normal(0, 100, 500) < 600).astype(int)
+    scaler = StandardScaler().fit(x)
+    return LogisticRegression().fit(scaler.transform(x), y), scaler
+
+
+async def send(port, message):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(message)
+        await writer.drain()
+        _, status, body = await read_http_message(reader)
+        return int(status), json.loads(body)
+    finally:
+        writer.close()
+
+
+# Run a coroutine against a service listening on a free local port
+def with_service(scenario):
+    async def run():
+        service = ScoringService(*fit_model(), max_wait=0.005)
+        server = await service.start(port=0)
+        try:
+            return await scenario(server.sockets[0].getsockname()[1])
+        finally:
+            await service.stop()
+    return asyncio.run(run())
+
+
+def test_load_generator_gets_every_request_scored():
+    result = with_service(lambda port: generate_load(port=port, concurrency=8, requests=400))
+    assert result['requests'] == 400
+    assert result['errors'] == 0
+    assert result['server']['loans'] == 400
+
+
+def test_bad_row_only_fails_its_own_request():
+    bad_loan = {**EXAMPLE_LOAN, 'income': float('nan')}
+
+    async def scenario(port):
+        # The bad loan is sent together with good ones, so they would share a batch
+        return await asyncio.gather(
+            send(port, http_request('POST', '/score', EXAMPLE_LOAN)),
+            send(port, http_request('POST', '/score', bad_loan)),
+            send(port, http_request('POST', '/score', {'loans': [EXAMPLE_LOAN, EXAMPLE_LOAN]})),
+            generate_load(port=port, concurrency=4, requests=100),
+        )
+
+    good, bad, several, load = with_service(scenario)
+    assert good[0] == 200 and 0.0 <= good[1]['probability_of_default'] <= 1.0
+    assert bad[0] == 400 and 'income' in bad[1]['error']
+    assert several[0] == 200 and several[1]['expected_loss'] == [good[1]['expected_loss']] * 2
+    assert load['errors'] == 0
+
+
+def test_malformed_content_length_is_rejected():
+    message = b"POST /score HTTP/1.1\r\nHost: localhost\r\nContent-Length: ten\r\n\r\n"
+    status, body = with_service(lambda port: send(port, message))
+    assert status == 400 and 'Content-Length' in body['error']
@@ -0,0 +1,57 @@
+# The dispatch dynamic program against brute force over every schedule of a small grid
+import itertools
+
+import numpy as np
+import pytest
+
+from gas_forecast import PriceTrendModel
+from storage_dispatch import optimize_storage_dispatch, window_max
+
+
+# Curve with given prices on consecutive days from 2021-01-01
+class DailyPrices:
+    first_ordinal = 737791
+
+    def __init__(self, prices):
+        self.daily_prices = np.asarray(prices, dtype=np.float64)
+
+    def prices_at_ordinals(self, ordinals):
+        return self.daily_prices[np.asarray(ordinals) - self.first_ordinal]
+
+
+# Value of the best schedule found by trying every sequence of inventory levels
+def brute_force_value(prices, injection_rate, withdrawal_rate, max_volume, storage_costs, volume_levels):
+    volumes = np.linspace(0.0, max_volume, volume_levels)
+    best = -np.inf
+    for levels in itertools.product(range(volume_levels), repeat=len(prices)):
+        path = volumes[[0, *levels]]
+        changes = np.diff(path)
+        if (changes > injection_rate + 1e-9).any() or (changes < -withdrawal_rate - 1e-9).any():
+            continue
+        best = max(best, float(np.sum(-prices * changes - storage_costs * path[1:])))
+    return best
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_dynamic_program_matches_brute_force(seed):
+    generator = np.random.default_rng(seed)
+    prices = generator.uniform(5, 15, 6)
+    injection_rate, withdrawal_rate = generator.choice([10.0, 20.0, 30.0], size=2)
+    value, schedule = optimize_storage_dispatch('2021-01-01', '2021-01-06', injection_rate, withdrawal_rate, 30.0, 0.1,
+                                                forward_curve=DailyPrices(prices), volume_levels=4)
+    assert value == pytest.approx(brute_force_value(prices, injection_rate, withdrawal_rate, 30.0, 0.1, 4))
+    assert schedule['cash_flow'].sum() == pytest.approx(value)
+
+
+def test_storage_without_capacity_is_worth_nothing():
+    curve = PriceTrendModel(737791, 10.0, 0.01)
+    value, schedule = optimize_storage_dispatch('2021-01-01', '2021-03-31', 10, 10, 0, 0.01, forward_curve=curve)
+    assert value == 0.0
+    assert (schedule['inventory'] == 0.0).all()
+
+
+def test_window_max_matches_loop():
+    values = np.random.default_rng(0).normal(size=(3, 17))
+    for behind, ahead in [(0, 0), (2, 5), (16, 0), (20, 20)]:
+        expected = [[row[max(0, i - behind):i + ahead + 1].max() for i in range(17)] for row in values]
+        np.testing.assert_array_equal(window_max(values, behind, ahead), expected)
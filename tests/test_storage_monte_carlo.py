@@ -0,0 +1,29 @@
+# Backward-drawn regression paths and reproducibility of the Monte Carlo storage valuation
+import numpy as np
+
+from storage_monte_carlo import SeasonalMeanReversionModel, value_storage_monte_carlo
+
+
+def test_bridge_paths_have_the_forward_distribution():
+    model = SeasonalMeanReversionModel(738000, [2.4, 0.05, 0.1, 0.05], kappa=0.5, sigma=0.3, last_ordinal=738000,
+                                       last_deviation=0.1)
+    ordinals = model.last_ordinal + np.array([30, 61, 92, 400])
+    generator = np.random.default_rng(0)
+    deviations = [model.bridge_deviations(ordinals[-1], 200000, generator)]
+    for t in range(len(ordinals) - 2, -1, -1):
+        deviations.insert(0, model.bridge_deviations(ordinals[t], 200000, generator, ordinals[t + 1], deviations[0]))
+
+    # Exact Ornstein-Uhlenbeck moments: mean x0 * exp(-kappa h), cov exp(-kappa |h - k|) * var(min(h, k))
+    horizons = (ordinals - model.last_ordinal) / 365.25
+    means, variances = model.deviation_moments(ordinals)
+    covariance = np.exp(-0.5 * np.abs(horizons[:, None] - horizons[None, :])) * np.minimum.outer(variances, variances)
+    np.testing.assert_allclose(np.mean(deviations, axis=1), means, atol=0.005)
+    np.testing.assert_allclose(np.cov(deviations), covariance, atol=0.003)
+
+
+def test_value_does_not_depend_on_the_number_of_workers():
+    options = dict(num_paths=4000, chunk_size=1000, volume_levels=11, seed=3)
+    in_process = value_storage_monte_carlo('2025-01-01', '2025-12-31', 10, 10, 100, 0.001, max_workers=1, **options)
+    pooled = value_storage_monte_carlo('2025-01-01', '2025-12-31', 10, 10, 100, 0.001, max_workers=2, **options)
+    assert in_process == pooled
+    assert in_process['value'] >= in_process['intrinsic_value'] - 3 * in_process['standard_error']
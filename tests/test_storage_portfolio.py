@@ -0,0 +1,52 @@
+# Parity of the batch contract pricer with the scalar price_gas_contract functions
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from forward_curve import load_forward_curve
+from gas_forecast import load_price_model
+from price_store import ordinals_to_dates
+from storage_portfolio import price_contract_portfolio
+
+task_2 = importlib.import_module('task-2')
+task_two = importlib.import_module('task-two')
+
+
+# Random contracts with dates inside and beyond the recorded prices, and capacities that bind
+def random_contracts(num_contracts, seed=0):
+    generator = np.random.default_rng(seed)
+    first_ordinal = load_forward_curve().first_ordinal
+    contracts = []
+    for _ in range(num_contracts):
+        dates = [list(ordinals_to_dates(first_ordinal + generator.integers(0, 3000, generator.integers(0, 8))).astype(str))
+                 for _ in range(2)]
+        contracts.append({
+            'injection_dates': dates[0],
+            'withdrawal_dates': dates[1],
+            'injection_rate': generator.uniform(0, 200),
+            'withdrawal_rate': generator.uniform(0, 200),
+            'max_volume': generator.uniform(0, 1000),
+            'storage_costs': generator.uniform(0, 0.05),
+        })
+    return pd.DataFrame(contracts)
+
+
+def test_portfolio_matches_forward_curve_pricer():
+    contracts = random_contracts(300)
+    values = price_contract_portfolio(contracts)['contract_value']
+    expected = [task_2.price_gas_contract('Nat_Gas.csv', *contract) for contract in contracts.itertuples(index=False)]
+    np.testing.assert_allclose(values, expected, rtol=1e-12, atol=1e-8)
+
+
+def test_portfolio_matches_trend_model_pricer():
+    contracts = random_contracts(300, seed=1)
+    values = price_contract_portfolio(contracts, forward_curve=load_price_model('Nat_Gas.csv'))['contract_value']
+    expected = [task_two.price_gas_contract(*contract) for contract in contracts.itertuples(index=False)]
+    np.testing.assert_allclose(values, expected, rtol=1e-12, atol=1e-8)
+
+
+def test_missing_columns_are_rejected():
+    with pytest.raises(ValueError, match='missing columns'):
+        price_contract_portfolio([{'injection_dates': ['2021-01-31']}])